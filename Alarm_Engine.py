@@ -0,0 +1,167 @@
+# Imports from python packages
+import numpy as np
+
+
+class AlarmRule:
+    # An alarm on one column of the data log, evaluated on the rows added since the last update
+    # Only changes of state are reported: (rule name, active, message) is added to the events when the alarm goes off
+    # and again when it clears. Within one update the alarm goes off at the first row outside its limits and clears
+    # only if the newest row is back inside, so a short spike is still reported but noisy data can't flood the events
+
+    def __init__(self, name, column=None):
+        self.name = name
+        self.column = column  # Column of the DatalogStore the rule watches (None for rules not based on the values)
+        self.active = False
+
+    def reset(self):
+        self.active = False
+
+    def update(self, elapsed_time, values, first, last, events):
+        pass
+
+    def data_received(self, now, events):
+        pass
+
+    def check(self, now, events):
+        pass  # Called regularly, for rules that go off when nothing happens
+
+    def set_active(self, active, message, events):
+        if active != self.active:
+            self.active = active
+            events.append((self.name, active, message))
+
+    def report(self, outside, valid, raise_message, clear_message, events):
+        # outside and valid hold one value per new row, the messages are functions of the index of the row
+        rows = np.flatnonzero(valid)
+        if len(rows) == 0:
+            return  # Missing values neither raise nor clear the alarm
+        outside_rows = rows[outside[rows]]
+        if len(outside_rows) > 0:
+            self.set_active(True, raise_message(outside_rows[0]), events)
+        if not outside[rows[-1]]:
+            self.set_active(False, clear_message(rows[-1]), events)
+
+
+class ThresholdRule(AlarmRule):
+    # Goes off while the value is below the minimum or above the maximum (either may be None)
+
+    def __init__(self, name, column, minimum=None, maximum=None, scale=1.0, unit=''):
+        super().__init__(name, column)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.scale = scale  # Unit conversion used only in the messages
+        self.unit = unit
+
+    def update(self, elapsed_time, values, first, last, events):
+        new_values = values[first:last]
+        below = new_values < self.minimum if self.minimum is not None else np.zeros(len(new_values), dtype=bool)
+        above = new_values > self.maximum if self.maximum is not None else np.zeros(len(new_values), dtype=bool)
+        self.report(below | above, ~np.isnan(new_values),
+                    lambda row: f"{self.name} {new_values[row] * self.scale:.2f} {self.unit} is " +
+                                (f"below {self.minimum * self.scale:.2f}" if below[row] else f"above {self.maximum * self.scale:.2f}") + f" {self.unit}",
+                    lambda row: f"{self.name} back to {new_values[row] * self.scale:.2f} {self.unit}", events)
+
+
+class RateOfChangeRule(AlarmRule):
+    # Goes off while the value changed by more than max_change compared with the row window seconds (elapsed time) earlier
+    # The earlier rows are searched only from the start of the last window on, so the cost of a new row depends on the
+    # rows in one window and never on the length of the history
+
+    def __init__(self, name, column, max_change, window, scale=1.0, unit=''):
+        super().__init__(name, column)
+        self.max_change = max_change
+        self.window = window
+        self.scale = scale
+        self.unit = unit
+        self.back = 0  # Row window seconds before the last row evaluated, only moves forward
+
+    def reset(self):
+        super().reset()
+        self.back = 0
+
+    def update(self, elapsed_time, values, first, last, events):
+        # Last row at least window seconds older than each new row (-1 when there is none yet)
+        back = np.searchsorted(elapsed_time[self.back:last], elapsed_time[first:last] - self.window, side='right') - 1 + self.back
+        self.back = max(int(back[-1]), self.back)
+        change = values[first:last] - values[np.maximum(back, 0)]
+        self.report(np.abs(change) > self.max_change, (back >= 0) & ~np.isnan(change),
+                    lambda row: f"{self.name} changed by {change[row] * self.scale:+.2f} {self.unit} in {self.window / 60:g} min (limit {self.max_change * self.scale:.2f} {self.unit})",
+                    lambda row: f"{self.name} back within {self.max_change * self.scale:.2f} {self.unit} per {self.window / 60:g} min", events)
+
+
+class NoDataRule(AlarmRule):
+    # Goes off when no new row arrived for timeout seconds of local time, so a stopped measurement and a lost
+    # connection are both noticed
+
+    def __init__(self, name, timeout):
+        super().__init__(name)
+        self.timeout = timeout
+        self.last_data_time = None
+
+    def reset(self):
+        super().reset()
+        self.last_data_time = None
+
+    def data_received(self, now, events):
+        self.last_data_time = now
+        self.set_active(False, f"{self.name}: data is arriving again", events)
+
+    def check(self, now, events):
+        if self.last_data_time is None:
+            self.last_data_time = now  # The time starts counting when monitoring starts
+        if now - self.last_data_time > self.timeout:
+            self.set_active(True, f"{self.name}: no new data for {now - self.last_data_time:.0f} s", events)
+
+
+class AlarmEngine:
+    # Evaluates the alarm rules of one folder on the rows added to its data log since the last update
+    # Rows already in the data log when it is first seen (or reloaded after it was replaced) are history: the rules
+    # start from the newest of them, so old events are not reported again
+
+    def __init__(self, rules=()):
+        self.set_rules(rules)
+
+    def set_rules(self, rules):
+        self.rules = list(rules)
+        self.count = 0  # Rows of the data log already evaluated
+        self.source = None
+
+    def update(self, datalog, now):
+        # Returns the events of the rows added since the last update
+        events = []
+        if datalog.length > 0 and (self.count == 0 or datalog.generation != self.source or datalog.length < self.count):
+            self.source = datalog.generation
+            self.count = datalog.length - 1
+            for rule in self.rules:
+                rule.reset()
+        if datalog.length > self.count:
+            elapsed_time = datalog.view('elapsed_time')
+            for rule in self.rules:
+                rule.data_received(now, events)
+                if rule.column is not None:
+                    rule.update(elapsed_time, datalog.view(rule.column), self.count, datalog.length, events)
+            self.count = datalog.length
+        for rule in self.rules:
+            rule.check(now, events)
+        return events
+
+    def active(self):
+        return [rule.name for rule in self.rules if rule.active]
+
+
+def alarm_rules(frequency_range=(None, None), impedance_range=(None, None), frequency_change=None, change_window=10.0, s11_level=None, no_data_timeout=None):
+    # Rules of the alarms offered by the window and the headless monitor, an alarm given None is left off
+    # Frequencies in MHz, impedance in ohm, change_window in minutes, S11 level in dB, timeout in seconds
+    rules = []
+    if frequency_range[0] is not None or frequency_range[1] is not None:
+        rules.append(ThresholdRule("Inflection Frequency", 'inflection_frequency', None if frequency_range[0] is None else frequency_range[0] * 1e6,
+                                   None if frequency_range[1] is None else frequency_range[1] * 1e6, 1e-6, 'MHz'))
+    if impedance_range[0] is not None or impedance_range[1] is not None:
+        rules.append(ThresholdRule("Inflection Impedance", 'inflection_impedance', impedance_range[0], impedance_range[1], 1.0, 'ohm'))
+    if frequency_change is not None:
+        rules.append(RateOfChangeRule("Inflection Frequency Drift", 'inflection_frequency', frequency_change * 1e6, change_window * 60, 1e-6, 'MHz'))
+    if s11_level is not None:
+        rules.append(ThresholdRule("S11 at Inflection Frequency", 's11_at_inflection', maximum=s11_level, unit='dB'))
+    if no_data_timeout is not None:
+        rules.append(NoDataRule("No Data", no_data_timeout))
+    return rules
@@ -0,0 +1,215 @@
+# Imports from python packages
+import os
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, Signal, QTimer
+import numpy as np
+
+# Imports from other python files
+from Decimation import MinMaxPyramid
+from Pipeline_Metrics import pipeline_metrics
+
+
+class AnalysisPool(QObject):
+    # Runs the parsing and analysis of the monitored folders on a pool of threads and hands the results back to the
+    # GUI thread, so the window never waits for a parse however long the data log grows
+    # A folder has at most one job at a time, so its data is only ever used by one thread, while several folders are
+    # processed at the same time on several cores (numpy and the pandas parser release the GIL for their heavy work)
+    # Results are applied within a time budget per pass of the event loop, the rest wait for the next pass so
+    # painting and user input are never held up by a batch of results
+    job_finished = Signal()  # Emitted on a pool thread after a result was queued
+    frame_budget = 10  # Milliseconds of results applied before the event loop gets control back
+
+    def __init__(self, workers=None):
+        super().__init__()
+        self.pool = ThreadPoolExecutor(max_workers=workers or min(os.cpu_count() or 1, 8))
+        self.running = set()  # Keys with a job on the pool or a result waiting to be applied
+        self.forgotten = set()  # Keys whose results are dropped (their graphs were closed)
+        self.stopped = False
+        self.results = deque()  # (Key, function taking the result, result or the exception raised), filled by the pool threads
+        self.job_finished.connect(self.start_applying)  # Received on the GUI thread
+        self.apply_timer = QTimer()
+        self.apply_timer.setSingleShot(True)
+        self.apply_timer.setInterval(0)
+        self.apply_timer.timeout.connect(self.apply_results)
+
+    def busy(self, key):
+        return key in self.running
+
+    def submit(self, key, job, request, apply):
+        # Runs job(request) on the pool and later apply(result) on the GUI thread
+        # Returns False when the last job of the key is not finished yet, the caller tries again later
+        if key in self.running or self.stopped:
+            return False
+        self.running.add(key)
+        self.forgotten.discard(key)
+        self.pool.submit(self.run_job, key, job, request, apply)
+        return True
+
+    def run_job(self, key, job, request, apply):
+        try:
+            with pipeline_metrics.measure('Analysis Job'):
+                result = job(request)
+        except Exception as error:
+            result = error
+        self.results.append((key, apply, result))  # Only the signal crosses threads, the result stays in the queue
+        self.job_finished.emit()
+
+    def forget(self, key):
+        # The result of a running job of the key is dropped
+        if key in self.running:
+            self.forgotten.add(key)
+
+    def start_applying(self):
+        if not self.apply_timer.isActive():
+            self.apply_timer.start()
+
+    def apply_results(self):
+        start = time.perf_counter()
+        while len(self.results) > 0:
+            key, apply, result = self.results.popleft()
+            self.running.discard(key)  # The key may start its next job while its result is applied
+            if key in self.forgotten:
+                self.forgotten.discard(key)
+            elif isinstance(result, Exception):
+                traceback.print_exception(result)
+            else:
+                apply(result)
+            if (time.perf_counter() - start) * 1000 > self.frame_budget:
+                break
+        pipeline_metrics.record('Apply Results', (time.perf_counter() - start) * 1000)
+        if len(self.results) > 0:
+            self.apply_timer.start()  # The rest is applied after the event loop handled painting and input
+
+    def shutdown(self):
+        # Waits for the running jobs, their results are not applied anymore
+        self.stopped = True
+        self.pool.shutdown(cancel_futures=True)
+
+
+class GraphRequest:
+    # Everything a job needs from the GUI thread, taken when the job is submitted
+
+    def __init__(self):
+        self.datalog_chunks = []  # Data log bytes handed over since the last job
+        self.sparams_contents = None  # Newest S-parameter file handed over since the last job
+        self.update_time_series = False
+        self.update_s11 = False
+        self.smoothing = None  # (filter, window) when the smoothing changed
+        self.alarm_rules = None  # New alarm rules, None when unchanged
+        self.auto_range_span = None  # Minutes shown while following new data, None when the ranges are fixed
+        self.views = {}  # Time series graph to its (time axis minimum, time axis maximum, width in pixels)
+        self.now = 0.0
+
+
+class GraphFrame:
+    # Result of a job, only ready to draw arrays and values that the GUI thread can use as they are
+
+    def __init__(self):
+        self.time_series_changed = False
+        self.sweep = None  # Latest sweep: frequency and S11 arrays, time received, graph title and inflection point
+        self.ranges = None  # Axis ranges fitted to the data when auto range is on
+        self.points = {}  # Time series graph to (range and width the points were made for, series name to x and y arrays)
+        self.alarm_events = []
+        self.active_alarms = []
+        self.full_sync_needed = False  # Bytes of the data log were missed, the whole file has to be sent again
+
+
+class GraphData:
+    # Data of one folder behind its graphs, only used by the jobs of the folder on the analysis pool
+    # Time series are kept in min/max pyramids and reduced to about two points per pixel of the graph they are drawn in
+    view_series = {'Inflection Frequency': ['inflection_frequency', 's11_at_inflection'], 'Inflection Impedance': ['inflection_impedance']}
+    scales = {'inflection_frequency': 1e-6}  # Hz to MHz, the unit of the value axis
+
+    def __init__(self, analysis):
+        self.analysis = analysis  # DeviceAnalysis of the folder
+        self.pyramids = {name: MinMaxPyramid() for name in ['inflection_frequency', 's11_at_inflection', 'inflection_impedance']}
+
+    def process(self, request):
+        analysis = self.analysis
+        frame = GraphFrame()
+        if request.smoothing is not None:
+            analysis.set_smoothing(*request.smoothing)
+        if request.alarm_rules is not None:
+            analysis.alarms.set_rules(request.alarm_rules)
+        for chunk in request.datalog_chunks:
+            analysis.receive(chunk, None)
+        analysis.receive(None, request.sparams_contents)
+
+        if request.update_time_series:
+            analysis.update()  # Parses and smooths the rows added to the data log
+            if analysis.datalog.length > 0:
+                source = analysis.source()  # Pyramids are rebuilt when the data log is replaced or the smoothing changes
+                self.pyramids['inflection_frequency'].update(analysis.inflection_frequency, source)
+                self.pyramids['s11_at_inflection'].update(analysis.datalog.view('s11_at_inflection'), source)
+                self.pyramids['inflection_impedance'].update(analysis.inflection_impedance, source)
+                frame.time_series_changed = True
+            frame.full_sync_needed = analysis.needs_full_sync()
+        if request.update_s11:
+            frame.sweep = self.latest_sweep()
+
+        if request.auto_range_span is not None:
+            frame.ranges = self.fit_ranges(request.auto_range_span)
+        for view, (time_elapsed_min, time_elapsed_max, pixels) in request.views.items():
+            if frame.ranges is not None:
+                time_elapsed_min, time_elapsed_max = frame.ranges['time']  # Points are made for the range the axes will have
+            frame.points[view] = ((time_elapsed_min, time_elapsed_max, pixels),
+                                  {name: self.decimate(name, time_elapsed_min, time_elapsed_max, pixels) for name in self.view_series[view]})
+
+        frame.alarm_events = analysis.check_alarms(request.now)
+        frame.active_alarms = analysis.alarms.active()
+        return frame
+
+    def latest_sweep(self):
+        sweep = self.analysis.read_sweep()  # Reads the sweep and finds its inflection point
+        if sweep is None:
+            return None
+        sparam_file_contents, frequency, s11_mag = sweep
+        inflection = self.analysis.latest_inflection
+        title = f'Antenna Reflection Data: Time Measurement was taken: {sparam_file_contents["Current Hour"][0]}:{sparam_file_contents["Current Minute"][0]}:{sparam_file_contents["Current Second"][0]}'
+        # Inflection frequency found locally next to the one computed on the server
+        title += f'<br>Inflection Frequency: {inflection["Inflection Frequency [Hz]"] * 1e-6:.2f} MHz'
+        server_inflection_frequency = self.analysis.server_inflection_frequency()
+        if server_inflection_frequency is not None:
+            title += f' (Server: {server_inflection_frequency * 1e-6:.2f} MHz)'
+        return {'frequency': frequency, 's11': s11_mag, 'receive_time': time.time(), 'title': title,
+                'inflection': (inflection['Inflection Frequency [Hz]'], inflection['S11 at Inflection Frequency [dB]'])}
+
+    def elapsed_time(self, name):
+        # Elapsed times of the samples in the pyramid of a series (smoothed series start at the first full window)
+        start = {'inflection_frequency': self.analysis.inflection_frequency_filter.start, 'inflection_impedance': self.analysis.inflection_impedance_filter.start}.get(name, 0)
+        return self.analysis.datalog.view('elapsed_time')[start:][:self.pyramids[name].count]
+
+    def decimate(self, name, time_elapsed_min, time_elapsed_max, pixels):
+        pyramid = self.pyramids[name]
+        elapsed_time_seconds = self.elapsed_time(name)
+        # Index range of the samples inside the time axis, plus one sample on each side so lines reach the edges
+        first, last = np.searchsorted(elapsed_time_seconds, [time_elapsed_min * 60, time_elapsed_max * 60])
+        index = pyramid.decimate(first - 1, last + 1, pixels)  # About two points per pixel, peaks are kept
+        index = index[~np.isnan(pyramid.values[index])]
+        return elapsed_time_seconds[index], pyramid.values[index]  # Copies, the pyramid keeps changing after the job
+
+    def fit_ranges(self, auto_range_span):
+        # Scrolls the time axes to the newest sample and fits the value axes to the samples inside the time range
+        # Extents come from the min/max pyramids, so following the data never scans the whole history
+        count = self.pyramids['s11_at_inflection'].count
+        if count == 0:
+            return None
+        time_elapsed_max = max(self.analysis.datalog.view('elapsed_time')[count - 1] / 60, auto_range_span)
+        time_elapsed_min = time_elapsed_max - auto_range_span
+        ranges = {'time': (time_elapsed_min, time_elapsed_max)}
+        for name, pyramid in self.pyramids.items():
+            elapsed_time_seconds = self.elapsed_time(name)
+            first = np.searchsorted(elapsed_time_seconds, time_elapsed_min * 60)
+            last = np.searchsorted(elapsed_time_seconds, time_elapsed_max * 60, side='right')
+            extent = pyramid.extent(first, last)
+            if extent is None:  # No samples in the time range, the axis is left where it is
+                ranges[name] = None
+                continue
+            minimum, maximum = extent[0] * self.scales.get(name, 1), extent[1] * self.scales.get(name, 1)
+            margin = 0.05 * (maximum - minimum) or 1  # Keeps the lines off the edges of the graph
+            ranges[name] = (minimum - margin, maximum + margin)
+        return ranges
@@ -0,0 +1,36 @@
+# Imports from python packages
+import numpy as np
+
+
+class SeriesFeed:
+    # Keeps a series attached to its chart and moves data into it in bulk instead of one QPointF at a time
+    # Qt Charts updates the whole series for every appended point, so the series always receives its points
+    # with a single replace call
+    initial_capacity = 4096
+
+    def __init__(self, series, x_scale=1, y_scale=1):
+        self.series = series
+        self.x_scale = x_scale  # Unit conversions applied only to the points sent to the series
+        self.y_scale = y_scale
+        self.count = 0  # Number of points in the series
+        self.x = np.empty(self.initial_capacity)
+        self.y = np.empty(self.initial_capacity)
+
+    def replace(self, x, y):
+        self.count = 0
+        self.add_points(x, y)
+        self.series.replaceNp(self.x[:self.count], self.y[:self.count])  # Swaps all points in a single call
+
+    def clear(self):
+        self.series.clear()
+        self.count = 0
+
+    def add_points(self, x, y):
+        needed = self.count + len(x)
+        if needed > len(self.x):
+            capacity = max(needed, 2 * len(self.x))
+            self.x = np.concatenate((self.x[:self.count], np.empty(capacity - self.count)))
+            self.y = np.concatenate((self.y[:self.count], np.empty(capacity - self.count)))
+        np.multiply(x, self.x_scale, out=self.x[self.count:needed])
+        np.multiply(y, self.y_scale, out=self.y[self.count:needed])
+        self.count = needed
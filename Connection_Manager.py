@@ -0,0 +1,61 @@
+# Imports from python packages
+import socket
+
+# Imports from other python files
+from Pipeline_Metrics import pipeline_metrics
+
+
+class ConnectionManager:
+    # Keeps the SSH connection to the server shared by all folders
+    # Keepalive packets are sent while the connection is idle, so a connection dropped by the network (or by a
+    # firewall closing idle connections) is noticed by the transport before the next poll. SFTP channels get a
+    # timeout, so a request on a connection that died silently fails instead of hanging the poll.
+    # Nagle's algorithm is turned off: it holds back a small request until the reply to the one before arrives, which
+    # would make requests sent on several channels at once wait for each other.
+    keepalive_interval = 10  # Seconds without traffic before a keepalive packet is sent
+    timeout = 10  # Seconds a connection attempt or an SFTP request may take
+
+    def __init__(self, hostname, port, user, password):
+        self.hostname = hostname
+        self.port = port
+        self.user = user
+        self.password = password
+        self.ssh = None  # SSH client, created with the first connection so the SSH stack is only loaded when it is used
+        self.connections = 0  # Connections made so far
+
+    def is_alive(self):
+        transport = self.ssh.get_transport() if self.ssh is not None else None
+        return transport is not None and transport.is_active()
+
+    def connect(self):
+        # Connects unless the current connection is still alive, returns True when a new connection was made
+        # (channels opened on an older connection can't be used anymore)
+        if self.is_alive():
+            return False
+        if self.ssh is None:
+            from paramiko import SSHClient, AutoAddPolicy
+            self.ssh = SSHClient()  # Defines SSH client
+            self.ssh.set_missing_host_key_policy(AutoAddPolicy())  # Adds host key if missing
+        self.close()
+        # With a password, keys and the agent are not tried first, which saves several round trips per connection
+        with pipeline_metrics.measure('Connect'):
+            self.ssh.connect(self.hostname, port=self.port, username=self.user, password=self.password, timeout=self.timeout,
+                             banner_timeout=self.timeout, auth_timeout=self.timeout, look_for_keys=self.password == '', allow_agent=self.password == '')
+        self.ssh.get_transport().set_keepalive(self.keepalive_interval)
+        self.ssh.get_transport().sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connections += 1
+        return True
+
+    def open_sftp(self):
+        # Opens an SFTP channel on the connection, several channels can be used at the same time
+        sftp_session = self.ssh.open_sftp()
+        sftp_session.get_channel().settimeout(self.timeout)
+        return sftp_session
+
+    def transport(self):
+        return self.ssh.get_transport()
+
+    def close(self):
+        # Also used when a request failed, the connection is then made again on the next poll
+        if self.ssh is not None:
+            self.ssh.close()
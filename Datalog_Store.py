@@ -0,0 +1,141 @@
+# Imports from python packages
+import io
+import os
+
+import numpy as np
+
+# Imports from other python files
+from Tail_Sync import read_appended
+
+
+class DatalogStore:
+    # Columns kept from the data log, named by the headers written on the server
+    columns = {
+        'elapsed_time': 'Elapsed Times [s]',
+        'inflection_frequency': 'Inflection Frequency [Hz]',
+        'inflection_impedance': 'Inflection Impedance [RE ohm]',
+        's11_at_inflection': 'S11 at Inflection Frequency [dB]',
+    }
+    initial_capacity = 4096
+    verify_length = 64
+
+    def __init__(self, path, cache=None):
+        self.path = path
+        self.cache = cache  # HistoryCache the parsed rows are also written to, or None
+        self.data = {}
+        self.reset()
+        if self.cache is not None:
+            self.load_cache()
+
+    def clear(self):
+        self.reset()
+        if self.cache is not None:
+            self.cache.clear()
+
+    def reset(self):
+        self.header = None
+        self.offset = 0  # Number of bytes of the file already parsed (always ends on a full row)
+        self.tail_bytes = b''
+        self.pending = b''  # Bytes read after the offset that do not make a full row yet
+        self.missed = False  # Set when bytes handed over in memory did not follow the bytes already read
+        self.length = 0  # Number of rows stored
+        self.generation = getattr(self, 'generation', -1) + 1  # Changes whenever previously stored rows are dropped
+        self.data = {name: np.empty(self.initial_capacity) for name in self.columns}
+
+    def load_cache(self):
+        cached = self.cache.load()
+        if cached is None:
+            return
+        header, offset, tail_bytes, columns = cached
+        # The cache is only used if the local data log still starts with the bytes the cached rows were parsed from
+        try:
+            with open(self.path, 'rb') as log_file:
+                valid = os.fstat(log_file.fileno()).st_size >= offset and read_appended(log_file, offset, tail_bytes, offset) is not None
+        except OSError:
+            valid = False
+        if not valid:
+            self.cache.clear()
+            return
+        self.header = header
+        self.offset = offset
+        self.tail_bytes = tail_bytes
+        self.append(columns)  # Copies the memory mapped columns into the arrays
+
+    def view(self, name):
+        column = self.data[name][:self.length]  # Slicing does not copy the data
+        column.flags.writeable = False
+        return column
+
+    def update(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0
+        if size < self.offset:
+            self.clear()  # The file was rewritten
+        if size == self.offset:
+            return 0
+
+        with open(self.path, 'rb') as log_file:
+            new_bytes = read_appended(log_file, self.offset, self.tail_bytes, size)
+            if new_bytes is None:
+                self.clear()  # The file was replaced, so it is read again from the beginning
+                new_bytes = read_appended(log_file, 0, b'', size)
+        if len(new_bytes) > len(self.pending):
+            self.pending = new_bytes  # The local file can be behind the bytes handed over in memory
+        return self.parse_pending()
+
+    def feed(self, chunk):
+        # Parses data log bytes handed over in memory by the transfer thread (a FileChunk), returns the number of new rows
+        # Bytes already read are skipped, so the chunks may overlap with a read of the local file
+        if chunk.replaced:
+            self.clear()
+        known = self.offset + len(self.pending)
+        if chunk.start > known:
+            # Bytes were missed. The local copy may be behind or not written at all, so the rows stored are kept and
+            # the bytes are dropped until the whole file is handed over again (a replaced chunk clears the flag)
+            self.missed = True
+            return 0
+        self.missed = False
+        self.pending += chunk.data[known - chunk.start:]
+        return self.parse_pending()
+
+    def parse_pending(self):
+        end = self.pending.rfind(b'\n') + 1  # Rows that are still being written are left for the next update
+        if end == 0:
+            return 0
+        row_bytes, self.pending = self.pending[:end], self.pending[end:]
+        return self.parse_rows(row_bytes)
+
+    def parse_rows(self, row_bytes):
+        import pandas as pd  # Loaded with the first rows so it does not slow down the start of the application
+        self.offset += len(row_bytes)
+        self.tail_bytes = (self.tail_bytes + row_bytes)[-self.verify_length:]
+        if self.header is None:
+            header_end = row_bytes.find(b'\n') + 1
+            self.header = list(pd.read_csv(io.BytesIO(row_bytes[:header_end]), nrows=0).columns)
+            row_bytes = row_bytes[header_end:]
+            if not row_bytes:
+                return 0
+
+        rows = pd.read_csv(io.BytesIO(row_bytes), header=None, names=self.header, usecols=list(self.columns.values()))
+        new_columns = {name: pd.to_numeric(rows[header], errors='coerce').to_numpy(dtype=float) for name, header in self.columns.items()}
+        self.append(new_columns)
+        if self.cache is not None:
+            self.cache.append(new_columns, self.header, self.offset, self.tail_bytes)
+        return len(rows)
+
+    def append(self, new_columns):
+        count = len(next(iter(new_columns.values())))
+        needed = self.length + count
+        capacity = len(self.data['elapsed_time'])
+        if needed > capacity:
+            while capacity < needed:
+                capacity *= 2  # Doubling keeps the cost of growing the arrays constant per row
+            for name in self.columns:
+                grown = np.empty(capacity)
+                grown[:self.length] = self.data[name][:self.length]
+                self.data[name] = grown
+        for name in self.columns:
+            self.data[name][self.length:needed] = new_columns[name]
+        self.length = needed
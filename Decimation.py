@@ -0,0 +1,121 @@
+# Imports from python packages
+import numpy as np
+
+
+class MinMaxPyramid:
+    # Level k of the pyramid holds the minimum and maximum (value and index) of each block of 2 ** k samples
+    # Only the blocks touched by new samples are recomputed, so the pyramid grows at a constant cost per sample
+    # and reducing any range of the history to a few points per pixel never looks at the raw samples
+    initial_capacity = 2048
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.source = None
+        self.values = np.empty(0)
+        self.levels = []  # [minimum values, minimum indexes, maximum values, maximum indexes] for levels 1, 2, ...
+
+    def update(self, values, source=None):
+        # values holds the full column, source identifies the data set so a replaced data set is rebuilt
+        if source != self.source or len(values) < self.count:
+            self.reset()
+            self.source = source
+        first = self.count
+        self.values = values
+        self.count = len(values)
+        if self.count == first:
+            return
+        level = 1
+        while self.count > 1 and (1 << (level - 1)) < self.count:
+            self.update_level(level, first)
+            level += 1
+
+    def update_level(self, level, first):
+        bucket_count = -(-self.count >> level)  # Rounds up so the last block may be partial
+        first_bucket = first >> level
+        child_start = 2 * first_bucket
+        child_stop = -(-self.count >> (level - 1))
+        child_min, child_min_index, child_max, child_max_index = self.buckets(level - 1, child_start, child_stop)
+        if (child_stop - child_start) % 2:  # Pads the partial block with a missing sample
+            child_min, child_max = np.append(child_min, np.nan), np.append(child_max, np.nan)
+            child_min_index, child_max_index = np.append(child_min_index, -1), np.append(child_max_index, -1)
+
+        new_min, new_min_index = self.combine(child_min.reshape(-1, 2), child_min_index.reshape(-1, 2), np.less)
+        new_max, new_max_index = self.combine(child_max.reshape(-1, 2), child_max_index.reshape(-1, 2), np.greater)
+
+        if len(self.levels) < level:
+            self.levels.append([np.empty(self.initial_capacity), np.empty(self.initial_capacity, dtype=np.int64),
+                                np.empty(self.initial_capacity), np.empty(self.initial_capacity, dtype=np.int64)])
+        arrays = self.levels[level - 1]
+        if bucket_count > len(arrays[0]):
+            for i, array in enumerate(arrays):
+                grown = np.empty(max(bucket_count, 2 * len(array)), dtype=array.dtype)
+                grown[:first_bucket] = array[:first_bucket]
+                arrays[i] = grown
+        for array, new in zip(arrays, (new_min, new_min_index, new_max, new_max_index)):
+            array[first_bucket:bucket_count] = new
+
+    def buckets(self, level, start, stop):
+        if level == 0:
+            index = np.arange(start, stop)
+            return self.values[start:stop], index, self.values[start:stop], index
+        return tuple(array[start:stop] for array in self.levels[level - 1])
+
+    @staticmethod
+    def combine(values, indexes, better):
+        # Picks the better of each pair of blocks, missing values lose to anything
+        left, right = values[:, 0], values[:, 1]
+        take_right = np.isnan(left) | better(right, left)
+        return np.where(take_right, right, left), np.where(take_right, indexes[:, 1], indexes[:, 0])
+
+    def decimate(self, first, last, pixels):
+        # Returns the indexes of the samples to draw for the range [first, last) on a plot that is pixels wide:
+        # the minimum and maximum of each pixel column, in the order they were measured
+        first, last = max(first, 0), min(last, self.count)
+        if last - first <= 2 * pixels:
+            return np.arange(first, last)
+        level = min(int(np.log2((last - first) / pixels)), len(self.levels))
+        start, stop = first >> level, -(-last >> level)
+        minimum, minimum_index, maximum, maximum_index = self.buckets(level, start, stop)
+
+        group = -(-(stop - start) // pixels)  # Blocks merged into each pixel column
+        padding = -(stop - start) % group
+        minimum = np.append(minimum, np.full(padding, np.nan)).reshape(-1, group)
+        maximum = np.append(maximum, np.full(padding, np.nan)).reshape(-1, group)
+        minimum_index = np.append(minimum_index, np.full(padding, -1)).reshape(-1, group)
+        maximum_index = np.append(maximum_index, np.full(padding, -1)).reshape(-1, group)
+        rows = np.arange(len(minimum))
+        column_min = minimum_index[rows, np.argmin(np.where(np.isnan(minimum), np.inf, minimum), axis=1)]
+        column_max = maximum_index[rows, np.argmax(np.where(np.isnan(maximum), -np.inf, maximum), axis=1)]
+
+        indexes = np.sort(np.stack((column_min, column_max), axis=1), axis=1).ravel()
+        indexes = indexes[indexes >= 0]
+        return indexes[np.diff(indexes, prepend=-1) != 0]  # A column whose minimum is also its maximum is drawn once
+
+    def extent(self, first, last):
+        # Minimum and maximum of the samples in [first, last), found from at most two blocks per level, so the
+        # extent of any window costs a few lookups however long the history is (None when the range holds no values)
+        first, last = max(first, 0), min(last, self.count)
+        minimum, maximum = np.inf, -np.inf
+        level = 0
+        while first < last:
+            if first & 1:  # Block at the start that is not aligned with the next level
+                minimum, maximum = self.merge(level, first, minimum, maximum)
+                first += 1
+            if last & 1 and first < last:  # Block at the end that is not aligned with the next level
+                last -= 1
+                minimum, maximum = self.merge(level, last, minimum, maximum)
+            first, last = first >> 1, last >> 1
+            level += 1
+        if minimum > maximum:
+            return None
+        return minimum, maximum
+
+    def merge(self, level, bucket, minimum, maximum):
+        block_min, _, block_max, _ = self.buckets(level, bucket, bucket + 1)
+        if not np.isnan(block_min[0]):  # Blocks holding only missing samples are skipped
+            minimum = min(minimum, float(block_min[0]))
+            maximum = max(maximum, float(block_max[0]))
+        return minimum, maximum
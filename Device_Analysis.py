@@ -0,0 +1,137 @@
+# Imports from python packages
+import io
+import time
+
+import numpy as np
+
+# Imports from other python files
+from Datalog_Store import DatalogStore
+from History_Cache import HistoryCache
+from Smoothing_Engine import smoothing_filters
+from Server_Transfer import monitor_files_directory
+from Sweep_History import SweepHistory
+from Inflection_Analytics import InflectionAnalyzer
+from Alarm_Engine import AlarmEngine
+from Pipeline_Metrics import pipeline_metrics
+
+
+class DeviceAnalysis:
+    # Data of one measurement folder without any graphs: the data log rows and the smoothed inflection values
+    # Used by the graphs of the window and by the headless monitor
+
+    def __init__(self, folder_name, smoothing_filter='Rolling Mean', smoothing=1, local_directory=None):
+        self.folder_name = folder_name
+        # Local files of the folder, replays keep theirs in a folder of their own
+        self.local_directory = local_directory if local_directory is not None else monitor_files_directory(folder_name)
+        # Data log rows are kept in memory and only the rows added since the last update are parsed
+        # Rows parsed by earlier runs are loaded from the binary history cache instead of parsing the data log again
+        self.datalog = DatalogStore(self.local_directory + '\\Datalog.txt', HistoryCache(self.local_directory + '\\History', DatalogStore.columns))
+        # New bytes are handed over in memory by the transfer thread, the local files are only read for the data left
+        # by the last run (the first update) and when bytes were missed
+        self.datalog_chunks = []
+        self.sparams_contents = None
+        self.local_files_read = False
+        self.full_sync_requested = False
+        self.smoothing_filter = smoothing_filter
+        self.smoothing = smoothing
+        # Smoothing filters only process the samples added since the last update
+        self.inflection_frequency_filter = smoothing_filters[smoothing_filter](smoothing)
+        self.inflection_impedance_filter = smoothing_filters[smoothing_filter](smoothing)
+        # Smoothed values, the first one belongs to row filter.start of the data log
+        self.inflection_frequency = np.empty(0)
+        self.inflection_impedance = np.empty(0)
+        # Every S11 sweep read, kept for the waterfall
+        self.sweep_history = SweepHistory()
+        # Inflection point found locally in the latest sweep, to cross-check the value computed on the server
+        self.inflection_analyzer = InflectionAnalyzer()
+        self.latest_inflection = None
+        # Alarms evaluated on the data log rows added since the last check
+        self.alarms = AlarmEngine()
+
+    def set_smoothing(self, smoothing_filter, smoothing):
+        if smoothing_filter != self.smoothing_filter:
+            self.inflection_frequency_filter = smoothing_filters[smoothing_filter](smoothing)
+            self.inflection_impedance_filter = smoothing_filters[smoothing_filter](smoothing)
+        else:
+            self.inflection_frequency_filter.set_window(smoothing)  # Filters are recomputed once on the next update
+            self.inflection_impedance_filter.set_window(smoothing)
+        self.smoothing_filter = smoothing_filter
+        self.smoothing = smoothing
+
+    def source(self):
+        # Changes whenever the smoothed values are recomputed from the start
+        return self.datalog.generation, self.smoothing_filter, self.smoothing
+
+    def receive(self, datalog_chunk, sparams_contents):
+        # Keeps the bytes handed over by the transfer thread until the next update
+        if datalog_chunk is not None:
+            self.datalog_chunks.append(datalog_chunk)
+        if sparams_contents is not None:
+            self.sparams_contents = sparams_contents  # Only the newest sweep is read
+
+    def update(self):
+        # Parses the rows added to the data log and smooths them, returns the number of new rows
+        with pipeline_metrics.measure('Parse'):
+            new_rows = 0
+            if not self.local_files_read:
+                new_rows = self.datalog.update()
+                self.local_files_read = True
+            for chunk in self.datalog_chunks:
+                new_rows += self.datalog.feed(chunk)
+            self.datalog_chunks = []
+        with pipeline_metrics.measure('Smoothing'):
+            self.inflection_frequency = self.inflection_frequency_filter.update(self.datalog.view('inflection_frequency'), self.datalog.generation)
+            self.inflection_impedance = self.inflection_impedance_filter.update(self.datalog.view('inflection_impedance'), self.datalog.generation)
+        return new_rows
+
+    def needs_full_sync(self):
+        # True once after bytes of the data log were missed, the transfer thread should then send the whole file again
+        if not self.datalog.missed:
+            self.full_sync_requested = False
+            return False
+        if self.full_sync_requested:
+            return False
+        self.full_sync_requested = True
+        return True
+
+    def check_alarms(self, now):
+        # Returns the alarm events of the rows added since the last check, as (alarm name, active, message)
+        with pipeline_metrics.measure('Alarms'):
+            return self.alarms.update(self.datalog, now)
+
+    def update_sweep(self):
+        # Reads the latest S11 sweep and adds it to the sweep history
+        sweep = self.read_sweep()
+        if sweep is None:
+            return None
+        sparam_file_contents, frequency, s11 = sweep
+        self.sweep_history.add(frequency, s11, time.time())
+        return sparam_file_contents
+
+    def read_sweep(self):
+        # Reads the latest S11 sweep and finds its inflection point, returns (file contents, frequency, S11) or None
+        sparam_file_contents = self.read_sparams()
+        if sparam_file_contents is None or len(sparam_file_contents) == 0:
+            return None
+        frequency = sparam_file_contents['Frequency [Hz]'].to_numpy(dtype=float)
+        s11 = sparam_file_contents['S11 [dB]'].to_numpy(dtype=float)
+        with pipeline_metrics.measure('Inflection Analysis'):
+            self.latest_inflection = {name: values[0] for name, values in self.inflection_analyzer.analyze(frequency, s11).items()}
+        return sparam_file_contents, frequency, s11
+
+    def server_inflection_frequency(self):
+        # Inflection frequency of the last data log row, computed on the server
+        if self.datalog.length == 0:
+            return None
+        return self.datalog.view('inflection_frequency')[-1]
+
+    def read_sparams(self):
+        import pandas as pd  # Loaded with the first sweep so it does not slow down the start of the application
+        # The contents handed over in memory, or the local file for the sweep left by the last run
+        contents, self.sparams_contents = self.sparams_contents, None
+        source = io.BytesIO(contents) if contents is not None else self.local_directory + '\\Latest_Sparams.txt'
+        try:
+            with pipeline_metrics.measure('Parse'):
+                return pd.read_csv(source)  # Reads s-parameter file as dataframe
+        except (OSError, ValueError):
+            return None  # No sweep written yet (local files are replaced whole, so a file is never read half written)
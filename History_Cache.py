@@ -0,0 +1,61 @@
+# Imports from python packages
+import json
+import os
+
+import numpy as np
+
+
+class HistoryCache:
+    # Binary copy of the parsed data log kept next to the local data log, so a restart maps the history back into
+    # memory instead of parsing the whole text file again
+    # Each column is a file of little endian float64 values that only grows, History.json records how many rows are
+    # valid and how far into the data log they reach
+    dtype = np.dtype('<f8')
+
+    def __init__(self, directory, columns):
+        self.directory = directory
+        self.columns = list(columns)
+        self.rows = 0
+
+    def column_path(self, name):
+        return os.path.join(self.directory, name + '.f64')
+
+    def meta_path(self):
+        return os.path.join(self.directory, 'History.json')
+
+    def load(self):
+        # Returns (header, offset, tail bytes, columns) with the columns memory mapped, or None without a usable cache
+        try:
+            with open(self.meta_path()) as meta_file:
+                meta = json.load(meta_file)
+            if meta['columns'] != self.columns:
+                return None
+            rows = meta['rows']
+            columns = {name: np.memmap(self.column_path(name), dtype=self.dtype, mode='r', shape=(rows,)) if rows > 0 else np.empty(0) for name in self.columns}
+        except (OSError, ValueError, KeyError):
+            return None
+        self.rows = rows
+        return meta['header'], meta['offset'], bytes.fromhex(meta['tail_bytes']), columns
+
+    def append(self, new_columns, header, offset, tail_bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        for name in self.columns:
+            # Writes after the last valid row, dropping anything left by an interrupted write
+            with open(self.column_path(name), 'r+b' if os.path.exists(self.column_path(name)) else 'wb') as column_file:
+                column_file.seek(self.rows * self.dtype.itemsize)
+                column_file.write(np.asarray(new_columns[name], dtype=self.dtype).tobytes())
+                column_file.truncate()
+        self.rows += len(new_columns[self.columns[0]])
+
+        meta = {'columns': self.columns, 'rows': self.rows, 'header': header, 'offset': offset, 'tail_bytes': tail_bytes.hex()}
+        with open(self.meta_path() + '.tmp', 'w') as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(self.meta_path() + '.tmp', self.meta_path())  # The row count is only updated once the rows are written
+
+    def clear(self):
+        self.rows = 0
+        for path in [self.meta_path()] + [self.column_path(name) for name in self.columns]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,86 @@
+# Imports from python packages
+import numpy as np
+
+
+class InflectionAnalyzer:
+    # Finds the inflection point (the S11 minimum of the resonance) of many sweeps at once
+    # Sweeps are the rows of a 2D array sharing one frequency array, every step works on all rows together, so a whole
+    # run can be processed again with new parameters in one call
+    # The minimum is refined between frequency points by fitting a parabola through it and its two neighbours
+    # Inflection impedance is not computed: it needs the phase of S11, which Latest_Sparams.txt does not hold
+
+    def __init__(self, smoothing=1, minimum_frequency=None, maximum_frequency=None, bandwidth_level=3.0):
+        self.smoothing = smoothing  # Points averaged along each sweep before searching (1 = no smoothing)
+        self.minimum_frequency = minimum_frequency  # Range searched for the minimum in Hz (None = whole sweep)
+        self.maximum_frequency = maximum_frequency
+        self.bandwidth_level = bandwidth_level  # dB above the minimum at which the bandwidth of the resonance is measured
+
+    def smooth(self, sweeps):
+        # Centered moving average along the frequency axis, the ends are averaged over the points available
+        if self.smoothing <= 1:
+            return sweeps
+        half = self.smoothing // 2
+        padded = np.pad(sweeps, ((0, 0), (half + 1, half)), mode='constant')
+        sums = np.cumsum(padded, axis=1)
+        counts = np.cumsum(np.pad(np.ones(sweeps.shape[1]), (half + 1, half), mode='constant'))
+        window = 2 * half + 1
+        return (sums[:, window:] - sums[:, :-window]) / (counts[window:] - counts[:-window])
+
+    def analyze(self, frequency, sweeps):
+        # frequency holds the points of every sweep, sweeps holds S11 in dB with one sweep per row
+        # Returns arrays with one value per sweep, named like the columns of the data log
+        frequency = np.asarray(frequency, dtype=float)
+        sweeps = self.smooth(np.atleast_2d(np.asarray(sweeps, dtype=float)))
+        rows = np.arange(len(sweeps))
+
+        searched = np.where(np.isnan(sweeps), np.inf, sweeps)
+        if self.minimum_frequency is not None:
+            searched[:, frequency < self.minimum_frequency] = np.inf
+        if self.maximum_frequency is not None:
+            searched[:, frequency > self.maximum_frequency] = np.inf
+        index = np.argmin(searched, axis=1)
+
+        # Parabola through the minimum and its neighbours (points at the ends of the sweep are not refined)
+        inner = np.clip(index, 1, sweeps.shape[1] - 2)
+        before, center, after = sweeps[rows, inner - 1], sweeps[rows, inner], sweeps[rows, inner + 1]
+        curvature = before - 2 * center + after
+        with np.errstate(divide='ignore', invalid='ignore'):
+            offset = np.where(curvature > 0, 0.5 * (before - after) / curvature, 0.0)
+        offset = np.where(inner == index, np.clip(offset, -0.5, 0.5), 0.0)
+        minimum = np.where(inner == index, center - 0.25 * (before - after) * offset, sweeps[rows, index])
+        position = index + offset  # Fractional index of the minimum
+        inflection_frequency = np.interp(position, np.arange(len(frequency)), frequency)
+
+        # Bandwidth: distance between the points on each side of the minimum where S11 rises above the level
+        level = minimum + self.bandwidth_level
+        points = np.arange(sweeps.shape[1])
+        above = sweeps > level[:, None]
+        left = np.where(above & (points < index[:, None]), points, -1).max(axis=1)
+        right = np.where(above & (points > index[:, None]), points, sweeps.shape[1]).min(axis=1)
+        found = (left >= 0) & (right < sweeps.shape[1])
+        left_frequency = self.crossing(frequency, sweeps, rows, np.maximum(left, 0), level)
+        right_frequency = self.crossing(frequency, sweeps, rows, np.minimum(right, sweeps.shape[1] - 1) - 1, level)
+        bandwidth = np.where(found, right_frequency - left_frequency, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            quality_factor = inflection_frequency / bandwidth
+
+        return {
+            'Inflection Frequency [Hz]': inflection_frequency,
+            'S11 at Inflection Frequency [dB]': minimum,
+            'Bandwidth [Hz]': bandwidth,
+            'Quality Factor': quality_factor,
+        }
+
+    @staticmethod
+    def crossing(frequency, sweeps, rows, index, level):
+        # Frequency where S11 crosses the level between points index and index + 1 (linear interpolation)
+        index = np.clip(index, 0, len(frequency) - 2)
+        first, second = sweeps[rows, index], sweeps[rows, index + 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(second != first, (level - first) / (second - first), 0.0)
+        return frequency[index] + np.clip(fraction, 0, 1) * (frequency[index + 1] - frequency[index])
+
+    def analyze_history(self, sweep_history):
+        # Analyzes every sweep kept in a SweepHistory, oldest first, returns the receive times and the results
+        rows = sweep_history.rows(sweep_history.oldest(), sweep_history.total)
+        return sweep_history.times[rows], self.analyze(sweep_history.frequency, sweep_history.sweeps[rows])
@@ -0,0 +1,188 @@
+# Runs the monitor without the window (on a lab server or over SSH without a display)
+# The server is polled (or followed in streaming mode) like in the application, the data log is smoothed and the
+# results are written to MonitorFiles\<folder>\Processed.csv, while connection states and new data go to stdout
+#
+# Usage: python Monitoring_Headless.py <folder names> [--smoothing 1] [--filter "Rolling Mean"] [--streaming] [--no-local-files]
+#        python Monitoring_Headless.py --replay <data log> [--sweeps <folder>] [--speed 10] [--smoothing 1] [--filter "Rolling Mean"]
+# --replay plays a recorded run through the same processing without connecting to the server, and stops at its end
+#          (its files, Processed.csv included, are written to MonitorFiles\Replays\Replay_<run folder>)
+# Alarms (all off by default): --alarm-frequency MIN,MAX [MHz]  --alarm-impedance MIN,MAX [ohm]  --alarm-drift MHZ,MINUTES
+#                              --alarm-s11 DB  --alarm-no-data SECONDS   (leave MIN or MAX empty for a one-sided limit, e.g. 1200,)
+
+# Imports from python packages
+import argparse
+import signal
+import time
+
+from PySide6.QtCore import QCoreApplication, QTimer
+import numpy as np
+import pandas as pd
+
+# Imports from other python files
+from Server_Transfer import ServerTransferThread
+from Run_Replay import RecordedRun, ReplayThread, replay_folder_name
+from Device_Analysis import DeviceAnalysis
+from Smoothing_Engine import smoothing_filters
+from Alarm_Engine import alarm_rules
+
+
+class HeadlessMonitor:
+
+    def __init__(self, app, folder_names, smoothing_filter, smoothing, streaming, transfer=None, alarm_settings=None):
+        self.app = app
+        self.transfer = transfer if transfer is not None else ServerTransferThread()  # A ReplayThread replays a recorded run
+        self.live = isinstance(self.transfer, ServerTransferThread)  # False while a recorded run is replayed
+        local_directory = None if self.live else self.transfer.local_directory
+        self.devices = {name: DeviceAnalysis(name, smoothing_filter, smoothing, local_directory) for name in folder_names}
+        for analysis in self.devices.values():
+            analysis.alarms.set_rules(alarm_rules(**(alarm_settings or {})))
+        self.written_rows = {}  # Rows of the data log already written to the processed file of each folder
+        self.written_sources = {}
+
+        self.transfer.bad_folder.connect(self.bad_folder_name)
+        self.transfer.new_data.connect(self.set_new_data)
+        self.transfer.state_changed.connect(self.set_connection_state)
+        if self.live:  # A replay plays its single folder from local files
+            self.transfer.set_streaming(streaming)
+            self.transfer.set_folders(list(self.devices))
+        for name in self.devices:
+            self.write_processed(name)  # Data left by the last run is written right away
+        self.transfer.start()
+        # Alarms are checked when new rows arrive, the timer lets the no data alarm go off while nothing arrives
+        self.Alarm_Check = QTimer()
+        self.Alarm_Check.timeout.connect(self.check_alarms)
+        self.Alarm_Check.start(1000)
+
+    def stop(self):
+        self.transfer.stop()  # Waits for the transfer thread to finish
+
+    def log(self, message):
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S')}  {message}", flush=True)
+
+    def set_connection_state(self, folder_name, state):
+        if folder_name in self.devices:
+            self.log(f"{folder_name}: {state}")
+
+    def bad_folder_name(self, folder_name):
+        self.log(f"{folder_name}: Folder does not exist on Server")
+        self.devices.pop(folder_name, None)
+        if self.live:
+            self.transfer.set_folders(list(self.devices))
+        if len(self.devices) == 0:
+            self.app.quit()
+
+    def set_new_data(self, folder_name, datalog_chunk, sparams_contents):
+        if folder_name not in self.devices:
+            return
+        self.devices[folder_name].receive(datalog_chunk, sparams_contents)  # The new bytes are handed over in memory
+        if datalog_chunk is not None:
+            new_rows = self.write_processed(folder_name)
+            analysis = self.devices[folder_name]
+            if analysis.needs_full_sync() and self.live:  # A replay hands over every byte it writes
+                self.transfer.request_full_sync(folder_name)
+            if new_rows > 0 and len(analysis.inflection_frequency) > 0:
+                self.log(f"{folder_name}: {new_rows} new rows, Inflection Frequency {analysis.inflection_frequency[-1] * 1e-6:.3f} MHz, Inflection Impedance {analysis.inflection_impedance[-1]:.2f} ohm")
+            self.check_alarms()
+        if sparams_contents is not None:
+            sparam_file_contents = self.devices[folder_name].update_sweep()
+            if sparam_file_contents is not None and len(sparam_file_contents) > 0:
+                inflection = self.devices[folder_name].latest_inflection
+                self.log(f"{folder_name}: New S11 sweep taken at {sparam_file_contents['Current Hour'][0]}:{sparam_file_contents['Current Minute'][0]}:{sparam_file_contents['Current Second'][0]}, "
+                         f"Inflection Frequency {inflection['Inflection Frequency [Hz]'] * 1e-6:.3f} MHz, S11 {inflection['S11 at Inflection Frequency [dB]']:.2f} dB")
+
+    def check_alarms(self):
+        now = time.time()
+        for folder_name, analysis in self.devices.items():
+            for alarm_name, active, message in analysis.check_alarms(now):
+                self.log(f"{folder_name}: {'ALARM' if active else 'Cleared'} {message}")
+
+    def write_processed(self, folder_name):
+        # Appends the rows added since the last write, the file is written again when the data log was replaced
+        analysis = self.devices[folder_name]
+        analysis.update()
+        if analysis.source() != self.written_sources.get(folder_name):
+            self.written_sources[folder_name] = analysis.source()
+            self.written_rows[folder_name] = 0
+        first = self.written_rows[folder_name]
+        last = analysis.datalog.length
+        if first == last:
+            return 0
+
+        columns = {}
+        for name, header in analysis.datalog.columns.items():
+            columns[header] = analysis.datalog.view(name)[first:last]
+        columns['Smoothed Inflection Frequency [Hz]'] = self.smoothed_rows(analysis.inflection_frequency, analysis.inflection_frequency_filter.start, first, last)
+        columns['Smoothed Inflection Impedance [RE ohm]'] = self.smoothed_rows(analysis.inflection_impedance, analysis.inflection_impedance_filter.start, first, last)
+        pd.DataFrame(columns).to_csv(analysis.local_directory + '\\Processed.csv', mode='w' if first == 0 else 'a', header=first == 0, index=False)
+        self.written_rows[folder_name] = last
+        return last - first
+
+    @staticmethod
+    def smoothed_rows(smoothed, start, first, last):
+        # Smoothed values of rows first to last, rows before the first full smoothing window have none
+        rows = np.full(last - first, np.nan)
+        index = np.arange(first, last) - start
+        valid = (index >= 0) & (index < len(smoothed))
+        rows[valid] = smoothed[index[valid]]
+        return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="RVNA measurement monitor without the window")
+    parser.add_argument('folders', nargs='?', default="", help="Folder names on the server (comma separated)")
+    parser.add_argument('--smoothing', type=int, default=1, help="Smoothing window in samples")
+    parser.add_argument('--filter', default='Rolling Mean', choices=list(smoothing_filters))
+    parser.add_argument('--streaming', action='store_true', help="Follow the data log instead of polling it")
+    parser.add_argument('--no-local-files', action='store_true', help="Don't keep copies of the server files (the next start downloads them again)")
+    parser.add_argument('--replay', help="Data log of a recorded run to replay instead of monitoring the server")
+    parser.add_argument('--sweeps', help="Folder of the sweep files recorded with the replayed run")
+    parser.add_argument('--speed', type=float, default=10, help="Speed-up of the replay (0 = as fast as possible)")
+    parser.add_argument('--alarm-frequency', help="Inflection frequency limits MIN,MAX in MHz")
+    parser.add_argument('--alarm-impedance', help="Inflection impedance limits MIN,MAX in ohm")
+    parser.add_argument('--alarm-drift', help="Largest inflection frequency change MHZ,MINUTES")
+    parser.add_argument('--alarm-s11', type=float, help="Highest S11 at the inflection frequency in dB")
+    parser.add_argument('--alarm-no-data', type=float, help="Seconds without new rows before an alarm")
+    arguments = parser.parse_args()
+
+    def pair(text, name):
+        # MIN,MAX with either side allowed to be empty
+        try:
+            first, second = text.split(',')
+            return float(first) if first.strip() != "" else None, float(second) if second.strip() != "" else None
+        except ValueError:
+            parser.error(f"{name} needs two comma separated numbers")
+
+    alarm_settings = {'s11_level': arguments.alarm_s11, 'no_data_timeout': arguments.alarm_no_data}
+    if arguments.alarm_frequency is not None:
+        alarm_settings['frequency_range'] = pair(arguments.alarm_frequency, '--alarm-frequency')
+    if arguments.alarm_impedance is not None:
+        alarm_settings['impedance_range'] = pair(arguments.alarm_impedance, '--alarm-impedance')
+    if arguments.alarm_drift is not None:
+        alarm_settings['frequency_change'], alarm_settings['change_window'] = pair(arguments.alarm_drift, '--alarm-drift')
+        if alarm_settings['frequency_change'] is None or alarm_settings['change_window'] is None:
+            parser.error("--alarm-drift needs the change and the minutes")
+    folder_names = []
+    for name in arguments.folders.split(','):
+        if name.strip() != "" and name.strip() not in folder_names:
+            folder_names.append(name.strip())
+    if arguments.replay is None and len(folder_names) == 0:
+        parser.error("folder names or --replay are needed")
+
+    Monitoring_App = QCoreApplication([])
+    if arguments.replay is not None:
+        Replay = ReplayThread(replay_folder_name(arguments.replay), RecordedRun(arguments.replay, arguments.sweeps), arguments.speed)
+        Replay.finished.connect(Monitoring_App.quit)  # Signals sent before the end of the replay are handled first
+        Monitor = HeadlessMonitor(Monitoring_App, [Replay.folder_name], arguments.filter, max(arguments.smoothing, 1), False, Replay, alarm_settings)
+    else:
+        Transfer = ServerTransferThread()
+        Transfer.set_local_files(not arguments.no_local_files)
+        Monitor = HeadlessMonitor(Monitoring_App, folder_names, arguments.filter, max(arguments.smoothing, 1), arguments.streaming, Transfer, alarm_settings)
+
+    # Ctrl+C stops the monitor, the timer lets Python handle the signal while Qt's event loop is running
+    signal.signal(signal.SIGINT, lambda *args: Monitoring_App.quit())
+    Signal_Check = QTimer()
+    Signal_Check.timeout.connect(lambda: None)
+    Signal_Check.start(250)
+
+    Monitoring_App.exec()
+    Monitor.stop()
@@ -1,19 +1,21 @@
 # Imports from python packages
-import os
-
-from PySide6.QtWidgets import QMainWindow, QPushButton, QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QMessageBox, QLineEdit, QLabel, QTabWidget
-from PySide6.QtGui import QIcon, QPainter
-from PySide6.QtCore import Signal, QThread, QTimer, QPointF, Qt
+from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QMessageBox, QLineEdit, QLabel, QTabWidget, QComboBox, QTableWidget, QTableWidgetItem, QFileDialog, QListWidget
+from PySide6.QtGui import QIcon, QPainter, QImage, QColor
+from PySide6.QtCore import Signal, QTimer, QPointF, Qt, QEvent, QRect, QRectF
 from PySide6.QtCharts import QChart, QChartView, QLineSeries, QScatterSeries, QValueAxis
-from PySide6.QtPdf import QPdfDocument
-from PySide6.QtPdfWidgets import QPdfView
-from paramiko import SSHClient, AutoAddPolicy
-import pandas as pd
+import numpy as np
 import time
-from os import getcwd, remove
 
 # Imports from other python files
-import User_Pass_Key
+from Chart_Series import SeriesFeed
+from Smoothing_Engine import smoothing_filters
+from Server_Transfer import ServerTransferThread
+from Run_Replay import RecordedRun, ReplayThread, replay_folder_name
+from Device_Analysis import DeviceAnalysis
+from Analysis_Worker import AnalysisPool, GraphData, GraphRequest
+from Sweep_History import SweepHistory
+from Alarm_Engine import alarm_rules
+from Pipeline_Metrics import pipeline_metrics, StageMetrics
 
 
 class MonitorWindow(QMainWindow):
@@ -33,22 +35,39 @@ class MonitorWindow(QMainWindow):
         self.inflection_impedance_max = 100
         self.inflection_impedance_min = 0
         self.smoothing = 1
-
-        # Initializing Timer and File Transfer Thread =============================================
+        self.smoothing_filter = 'Rolling Mean'
+        self.auto_range = False  # Time axes follow the newest data and value axes fit the samples shown
+        self.alarm_settings = {}  # Alarms entered in the alarm window, given to alarm_rules (no alarms until some are entered)
+        self.folder_names = []  # Measurement folders being monitored
+        self.connection_states = {}
+
+        # Initializing File Transfer Thread ======================================================
+        # The thread runs until the window is closed, polling the server on its own schedule
         self.transfer = ServerTransferThread()
         self.transfer.bad_folder.connect(self.bad_folder_name)
-
-        self.transfer_timer = QTimer()
-        self.transfer_timer.timeout.connect(self.run_file_transfer)
-        self.transfer_timer.setInterval(3000)  # Every 5 seconds, the program will attempt to connect to the server and upload log file
-        self.transfer_timer.start()
+        self.transfer.new_data.connect(self.set_new_data)
+        self.transfer.state_changed.connect(self.set_connection_state)
+        self.transfer.start()
+        self.replays = {}  # Folder name to ReplayThread of the recorded runs being replayed
+        # Parsing and analysis of every folder run on the threads of the pool, the window only draws their results
+        self.analysis_pool = AnalysisPool()
+
+        self.connection_state_label = QLabel()
+        self.statusBar().addPermanentWidget(self.connection_state_label)
+        # Median times of the slowest stages, details are shown in the performance panel
+        self.metrics_label = QLabel()
+        self.statusBar().addWidget(self.metrics_label)
+        self.Metrics_Update = QTimer()
+        self.Metrics_Update.timeout.connect(self.update_metrics_label)
+        self.Metrics_Update.setInterval(1000)
+        self.Metrics_Update.start()
         # =========================================================================================
 
         # Button for Folder Input =================================================================
         self.folder_window = ServerFolderWidget()
         self.folder_window.folder_name.connect(self.set_folder_name)
         # Adding Push Button to Start Graphing (User Must Input Folder Name)
-        self.graph_start = QPushButton("Enter Folder Name")
+        self.graph_start = QPushButton("Enter Folder Names")
         self.graph_start.setFixedWidth(300)
         self.graph_start.setFixedHeight(40)
         self.graph_start.clicked.connect(self.folder_window.show)
@@ -99,116 +118,27 @@ class MonitorWindow(QMainWindow):
         self.smoothing_label = QLabel()
         self.smoothing_label.setFixedWidth(60)
         self.smoothing_label.setText("Smoothing: ")
+        # Combo Box for Smoothing Filter
+        self.set_smoothing_filter = QComboBox()
+        self.set_smoothing_filter.setFixedWidth(170)
+        self.set_smoothing_filter.addItems(list(smoothing_filters))
+        self.set_smoothing_filter.currentTextChanged.connect(self.enter_smoothing_filter)
         # =========================================================================================
 
-        # Graph Properties ========================================================================
-        # X-axis used for S11 graph
-        self.frequency_axis = QValueAxis()
-        self.frequency_axis.setRange(0.85, 4)  # Sets graph from 0.85-4 GHz
-        self.frequency_axis.setLabelFormat("%0.2f")
-        self.frequency_axis.setTickType(QValueAxis.TickType.TicksFixed)
-        self.frequency_axis.setTickCount(21)
-        self.frequency_axis.setTitleText("Frequency [GHz]")
-        # Y-axis used for S11 graph
-        self.s11_mag_axis = QValueAxis()
-        self.s11_mag_axis.setRange(-50, 0)
-        self.s11_mag_axis.setLabelFormat("%0.1f")
-        self.s11_mag_axis.setTickType(QValueAxis.TickType.TicksFixed)
-        self.s11_mag_axis.setTickCount(13)
-        self.s11_mag_axis.setTitleText("S11 [dB]")
-
-        self.s11_series = QLineSeries()
-
-        # Elapsed Time Axis 1
-        self.time_elapsed_axis_1 = QValueAxis()
-        self.time_elapsed_axis_1.setRange(self.time_elapsed_min, self.time_elapsed_max)
-        self.time_elapsed_axis_1.setLabelFormat("%0.1f")
-        self.time_elapsed_axis_1.setTickType(QValueAxis.TickType.TicksFixed)
-        self.time_elapsed_axis_1.setTickCount(21)
-        self.time_elapsed_axis_1.setTitleText("Time Elapsed [min]")
-
-        # Elapsed Time Axis 2
-        self.time_elapsed_axis_2 = QValueAxis()
-        self.time_elapsed_axis_2.setRange(self.time_elapsed_min, self.time_elapsed_max)
-        self.time_elapsed_axis_2.setLabelFormat("%0.1f")
-        self.time_elapsed_axis_2.setTickType(QValueAxis.TickType.TicksFixed)
-        self.time_elapsed_axis_2.setTickCount(21)
-        self.time_elapsed_axis_2.setTitleText("Time Elapsed [min]")
-
-        # Inflection Frequency Axis
-        self.inflection_frequency_axis = QValueAxis()
-        self.inflection_frequency_axis.setLabelFormat("%0.1f")
-        self.inflection_frequency_axis.setTickType(QValueAxis.TickType.TicksFixed)
-        self.inflection_frequency_axis.setTickCount(11)
-        self.inflection_frequency_axis.setTitleText("Inflection Frequency [MHz]")
-        self.inflection_frequency_axis.setRange(self.inflection_frequency_min, self.inflection_frequency_max)
-
-        # Inflection Impedance Axis
-        self.inflection_impedance_axis = QValueAxis()
-        self.inflection_impedance_axis.setLabelFormat("%0.1f")
-        self.inflection_impedance_axis.setTickType(QValueAxis.TickType.TicksFixed)
-        self.inflection_impedance_axis.setTickCount(11)
-        self.inflection_impedance_axis.setTitleText("Inflection Impedance [RE ohm]")
-        self.inflection_impedance_axis.setRange(self.inflection_impedance_min, self.inflection_impedance_max)
-
-        # Y-axis used for inflection impedance graph
-        self.s11_min_axis = QValueAxis()
-        self.s11_min_axis.setRange(-40, 0)
-        self.s11_min_axis.setLabelFormat("%d")
-        self.s11_min_axis.setTickType(QValueAxis.TickType.TicksFixed)
-        self.s11_min_axis.setTickCount(11)
-        self.s11_min_axis.setTitleText("S11 @ Inflection Frequency [dB]")
-
-        self.inflection_frequency_series = QLineSeries()
-        self.inflection_frequency_series.setName("Infection Frequency")
-        self.s11_min_series = QScatterSeries()
-        self.s11_min_series.setName("Minimum S11")
-        self.s11_min_series.setMarkerSize(2)
-        self.s11_min_series.setBorderColor(Qt.GlobalColor.transparent)
-
-        self.inflection_impedance_series = QLineSeries()
-
+        # Graph Updates ===========================================================================
         self.Plotting_Graph = QTimer()
         self.Plotting_Graph.timeout.connect(self.graphing_plots)
         self.Plotting_Graph.setInterval(2000)  # Every 2 second, the program will update graphs
         self.Plotting_Graph.start()
         # =========================================================================================
 
-        # Graphs for Tabs =========================================================================
-        self.Inflection_Frequency_Graph = QChart()
-        self.Inflection_Frequency_Graph.setTitle('Inflection Frequency Over Time')
-        self.Inflection_Frequency_Graph.addAxis(self.s11_min_axis, Qt.AlignmentFlag.AlignRight)
-        self.Inflection_Frequency_Graph.addAxis(self.time_elapsed_axis_1, Qt.AlignmentFlag.AlignBottom)
-        self.Inflection_Frequency_Graph.addAxis(self.inflection_frequency_axis, Qt.AlignmentFlag.AlignLeft)
-
-        self.Inflection_Frequency_Graph_View = QChartView(self.Inflection_Frequency_Graph)
-        self.Inflection_Frequency_Graph_View.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        self.Inflection_Impedance_Graph = QChart()
-        self.Inflection_Impedance_Graph.setTitle('Inflection Impedance Over Time')
-        self.Inflection_Impedance_Graph.legend().hide()
-        self.Inflection_Impedance_Graph.addAxis(self.time_elapsed_axis_2, Qt.AlignmentFlag.AlignBottom)
-        self.Inflection_Impedance_Graph.addAxis(self.inflection_impedance_axis, Qt.AlignmentFlag.AlignLeft)
-
-        self.Inflection_Impedance_Graph_View = QChartView(self.Inflection_Impedance_Graph)
-        self.Inflection_Impedance_Graph_View.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        self.S11_Graph = QChart()
-        self.S11_Graph.setTitle('Lateset S11')
-        self.S11_Graph.legend().hide()
-        self.S11_Graph.addAxis(self.frequency_axis, Qt.AlignmentFlag.AlignBottom)
-        self.S11_Graph.addAxis(self.s11_mag_axis, Qt.AlignmentFlag.AlignLeft)
-
-        self.S11_Graph_View = QChartView(self.S11_Graph)
-        self.S11_Graph_View.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        # =========================================================================================
-
-        # Tabs for Different Graphs ===============================================================
-        self.tab_menu = QTabWidget()
-        self.tab_menu.addTab(self.Inflection_Frequency_Graph_View, "Inflection Frequency vs Time")
-        self.tab_menu.addTab(self.Inflection_Impedance_Graph_View, "Inflection Impedance vs Time")
-        self.tab_menu.addTab(self.S11_Graph_View, "Latest S11")
+        # Tabs for Different Devices =============================================================
+        # Each measurement folder gets its own tabs of graphs
+        self.devices = {}
+        self.device_tabs = QTabWidget()
+        self.device_tabs.setTabsClosable(True)
+        self.device_tabs.tabCloseRequested.connect(self.close_device_tab)
+        self.device_tabs.currentChanged.connect(self.render_visible)
         # =========================================================================================
 
         # Layout Configuration ====================================================================
@@ -237,6 +167,7 @@ class MonitorWindow(QMainWindow):
         smoothing_layout = QHBoxLayout()
         smoothing_layout.addWidget(self.smoothing_label)
         smoothing_layout.addWidget(self.set_smoothing)
+        smoothing_layout.addWidget(self.set_smoothing_filter)
 
         above_tabs_layout = QHBoxLayout()   # Combines Button and Line Edits
         above_tabs_layout.addWidget(self.graph_start)
@@ -245,7 +176,7 @@ class MonitorWindow(QMainWindow):
 
         window_layout = QVBoxLayout(main_widget)    # Combines top combination of widgets with the tabs
         window_layout.addLayout(above_tabs_layout)
-        window_layout.addWidget(self.tab_menu)
+        window_layout.addWidget(self.device_tabs)
         # =========================================================================================
 
         # Menubar =================================================================================
@@ -253,23 +184,127 @@ class MonitorWindow(QMainWindow):
         # Help Menu (Used to help users)
         help_menu = self.menu_bar.addMenu("Help")
         pdf_help_action = help_menu.addAction("Help Document")
-        self.pdf_view_window = HelpWidget()
-        pdf_help_action.triggered.connect(self.pdf_view_window.show)
-
-    def run_file_transfer(self):
-        self.transfer.start()
-
-    @staticmethod
-    def set_folder_name(folder_name):
-        ServerTransferThread.measurements_directory = folder_name
-
-    @staticmethod
-    def bad_folder_name():
-        ServerTransferThread.measurements_directory = None
+        self.pdf_view_window = None  # Created when the help document is first opened
+        pdf_help_action.triggered.connect(self.show_help)
+        # Settings Menu
+        settings_menu = self.menu_bar.addMenu("Settings")
+        streaming_action = settings_menu.addAction("Streaming Mode")  # Follows the data log instead of polling it
+        streaming_action.setCheckable(True)
+        streaming_action.toggled.connect(self.transfer.set_streaming)
+        local_files_action = settings_menu.addAction("Save Files Locally")  # Copies on disk let the next start resume without downloading everything
+        local_files_action.setCheckable(True)
+        local_files_action.setChecked(True)
+        local_files_action.toggled.connect(self.transfer.set_local_files)
+        auto_range_action = settings_menu.addAction("Auto Range")  # Graphs scroll with new data, the time span entered is kept
+        auto_range_action.setCheckable(True)
+        auto_range_action.toggled.connect(self.set_auto_range)
+        replay_action = settings_menu.addAction("Replay Recorded Run")  # Plays a finished measurement from local files
+        self.replay_window = ReplayWidget()
+        self.replay_window.replay.connect(self.start_replay)
+        replay_action.triggered.connect(self.replay_window.show)
+        # Alarms Menu
+        alarms_menu = self.menu_bar.addMenu("Alarms")
+        alarm_settings_action = alarms_menu.addAction("Alarm Settings and Log")
+        self.alarm_window = AlarmWidget()
+        self.alarm_window.alarm_settings.connect(self.set_alarm_settings)
+        alarm_settings_action.triggered.connect(self.alarm_window.show)
+        # Diagnostics Menu
+        diagnostics_menu = self.menu_bar.addMenu("Diagnostics")
+        performance_action = diagnostics_menu.addAction("Performance Panel")
+        self.performance_window = PerformanceWidget()
+        performance_action.triggered.connect(self.performance_window.show)
+
+    def show_help(self):
+        if self.pdf_view_window is None:
+            from Help_Widget import HelpWidget  # The PDF viewer is only loaded when it is first used
+            self.pdf_view_window = HelpWidget()
+        self.pdf_view_window.show()
+
+    def set_folder_name(self, folder_name):
+        # Several folders can be monitored at once by separating their names with commas
+        self.folder_names = []
+        for name in folder_name.split(','):
+            if name.strip() != "" and name.strip() not in self.folder_names:
+                self.folder_names.append(name.strip())
+        for name in list(self.devices):
+            if name not in self.folder_names and name not in self.replays:
+                self.remove_device(name)
+        for name in self.folder_names:
+            if name not in self.devices:
+                self.devices[name] = DeviceGraphs(name, self)
+                self.device_tabs.addTab(self.devices[name], name)
+        self.transfer.set_folders(self.folder_names)
+
+    def start_replay(self, datalog_path, sweep_folder, speed):
+        folder_name = replay_folder_name(datalog_path)
+        if folder_name in self.devices:
+            self.remove_device(folder_name)  # A run replayed again starts from the beginning
+        try:
+            recorded_run = RecordedRun(datalog_path, sweep_folder if sweep_folder != "" else None)
+            # The replay writes the local files of its folder, which are then read like data from the server
+            replay = ReplayThread(folder_name, recorded_run, speed)
+        except (OSError, ValueError, IndexError):
+            user_alert = QMessageBox()
+            user_alert.setWindowTitle("Attention")
+            user_alert.setText(f"{datalog_path} is not a data log that can be replayed")
+            user_alert.setIcon(QMessageBox.Icon.Warning)
+            user_alert.addButton(QMessageBox.StandardButton.Ok)
+            user_alert.exec()
+            return
+        replay.new_data.connect(self.set_new_data)
+        replay.state_changed.connect(self.set_connection_state)
+        self.replays[folder_name] = replay
+        self.devices[folder_name] = DeviceGraphs(folder_name, self, replay.local_directory)
+        self.device_tabs.addTab(self.devices[folder_name], folder_name)
+        self.device_tabs.setCurrentWidget(self.devices[folder_name])
+        replay.start()
+
+    def close_device_tab(self, index):
+        folder_name = self.device_tabs.tabText(index)
+        self.remove_device(folder_name)
+        if folder_name in self.folder_names:
+            self.folder_names.remove(folder_name)
+            self.transfer.set_folders(self.folder_names)
+
+    def remove_device(self, folder_name):
+        if folder_name in self.replays:
+            self.replays.pop(folder_name).stop()
+        device = self.devices.pop(folder_name)
+        self.analysis_pool.forget(device)  # A job still running for the folder is not drawn
+        self.device_tabs.removeTab(self.device_tabs.indexOf(device))
+        device.deleteLater()
+        self.connection_states.pop(folder_name, None)
+
+    def set_connection_state(self, folder_name, state):
+        self.connection_states[folder_name] = state
+        self.connection_state_label.setText("   ".join(f"{name}: {self.connection_states[name]}" for name in self.folder_names + list(self.replays) if name in self.connection_states))
+
+    def update_metrics_label(self):
+        parts = []
+        for stage in ['Poll Cycle', 'Parse', 'Chart Paint']:
+            median = pipeline_metrics.percentile(stage, 50)
+            if median is not None:
+                parts.append(f"{stage}: {median:.1f} ms")
+        self.metrics_label.setText("   ".join(parts))
+
+    def closeEvent(self, event):
+        self.transfer.stop()  # Waits for the transfer thread to finish before closing
+        for replay in self.replays.values():
+            replay.stop()
+        self.analysis_pool.shutdown()
+        self.performance_window.close()
+        self.alarm_window.close()
+        super().closeEvent(event)
+
+    def bad_folder_name(self, folder_name):
+        if folder_name in self.devices:
+            self.remove_device(folder_name)
+            self.folder_names.remove(folder_name)
+            self.transfer.set_folders(self.folder_names)
         # User Alert MessageBox to notify user that the folder name does not exist on the server
         user_alert = QMessageBox()
         user_alert.setWindowTitle("Attention")
-        user_alert.setText("Folder Name does not exist on Server")
+        user_alert.setText(f"Folder Name {folder_name} does not exist on Server")
         user_alert.setInformativeText("Please Change the Folder Name")
         user_alert.setIcon(QMessageBox.Icon.Warning)
         user_alert.addButton(QMessageBox.StandardButton.Ok)
@@ -282,7 +317,7 @@ class MonitorWindow(QMainWindow):
             try:
                 if float(min_imp) < float(self.inflection_impedance_max):
                     self.inflection_impedance_min = float(min_imp)
-                    self.inflection_impedance_axis.setRange(self.inflection_impedance_min, self.inflection_impedance_max)
+                    self.set_graph_ranges()
                 else:
                     pass
             except ValueError:
@@ -291,7 +326,7 @@ class MonitorWindow(QMainWindow):
             try:
                 if float(max_imp) > float(self.inflection_impedance_min):
                     self.inflection_impedance_max = float(max_imp)
-                    self.inflection_impedance_axis.setRange(self.inflection_impedance_min, self.inflection_impedance_max)
+                    self.set_graph_ranges()
                 else:
                     pass
             except ValueError:
@@ -301,7 +336,7 @@ class MonitorWindow(QMainWindow):
                 if float(max_imp) > float(min_imp):
                     self.inflection_impedance_max = float(max_imp)
                     self.inflection_impedance_min = float(min_imp)
-                    self.inflection_impedance_axis.setRange(self.inflection_impedance_min, self.inflection_impedance_max)
+                    self.set_graph_ranges()
                 else:
                     pass
             except ValueError:
@@ -314,8 +349,7 @@ class MonitorWindow(QMainWindow):
             try:
                 if float(min_time) < float(self.time_elapsed_max):
                     self.time_elapsed_min = float(min_time)
-                    self.time_elapsed_axis_1.setRange(self.time_elapsed_min, self.time_elapsed_max)
-                    self.time_elapsed_axis_2.setRange(self.time_elapsed_min, self.time_elapsed_max)
+                    self.set_graph_ranges()
                 else:
                     pass
             except ValueError:
@@ -324,8 +358,7 @@ class MonitorWindow(QMainWindow):
             try:
                 if float(max_time) > float(self.time_elapsed_min):
                     self.time_elapsed_max = float(max_time)
-                    self.time_elapsed_axis_1.setRange(self.time_elapsed_min, self.time_elapsed_max)
-                    self.time_elapsed_axis_2.setRange(self.time_elapsed_min, self.time_elapsed_max)
+                    self.set_graph_ranges()
                 else:
                     pass
             except ValueError:
@@ -335,8 +368,7 @@ class MonitorWindow(QMainWindow):
                 if float(max_time) > float(min_time):
                     self.time_elapsed_max = float(max_time)
                     self.time_elapsed_min = float(min_time)
-                    self.time_elapsed_axis_1.setRange(self.time_elapsed_min, self.time_elapsed_max)
-                    self.time_elapsed_axis_2.setRange(self.time_elapsed_min, self.time_elapsed_max)
+                    self.set_graph_ranges()
                 else:
                     pass
             except ValueError:
@@ -349,7 +381,7 @@ class MonitorWindow(QMainWindow):
             try:
                 if float(min_freq) < float(self.inflection_frequency_max):
                     self.inflection_frequency_min = float(min_freq)
-                    self.inflection_frequency_axis.setRange(self.inflection_frequency_min, self.inflection_frequency_max)
+                    self.set_graph_ranges()
                 else:
                     pass
             except ValueError:
@@ -358,7 +390,7 @@ class MonitorWindow(QMainWindow):
             try:
                 if float(max_freq) > float(self.inflection_frequency_min):
                     self.inflection_frequency_max = float(max_freq)
-                    self.inflection_frequency_axis.setRange(self.inflection_frequency_min, self.inflection_frequency_max)
+                    self.set_graph_ranges()
                 else:
                     pass
             except ValueError:
@@ -368,79 +400,561 @@ class MonitorWindow(QMainWindow):
                 if float(max_freq) > float(min_freq):
                     self.inflection_frequency_max = float(max_freq)
                     self.inflection_frequency_min = float(min_freq)
-                    self.inflection_frequency_axis.setRange(self.inflection_frequency_min, self.inflection_frequency_max)
+                    self.set_graph_ranges()
                 else:
                     pass
             except ValueError:
                 pass
 
+    def set_graph_ranges(self):
+        for device in self.devices.values():
+            device.set_ranges(self.time_elapsed_min, self.time_elapsed_max, self.inflection_frequency_min, self.inflection_frequency_max, self.inflection_impedance_min, self.inflection_impedance_max)
+            device.set_auto_range(self.auto_range_span())
+
+    def set_auto_range(self, auto_range):
+        self.auto_range = auto_range
+        self.set_graph_ranges()  # The ranges entered are restored when auto range is turned off
+
+    def auto_range_span(self):
+        # Minutes of data shown while following new data, None when the ranges are fixed
+        return self.time_elapsed_max - self.time_elapsed_min if self.auto_range else None
+
+    def set_new_data(self, folder_name, datalog_chunk, sparams_contents):
+        if folder_name in self.devices:
+            self.devices[folder_name].set_new_data(datalog_chunk, sparams_contents)
+
     def graphing_plots(self):
+        for device in self.devices.values():
+            device.graphing_plots()  # New data of every device goes to the analysis pool, only the graph shown is drawn
+
+    def set_alarm_settings(self, alarm_settings):
+        self.alarm_settings = alarm_settings
+        for device in self.devices.values():
+            device.set_alarm_rules(alarm_rules(**alarm_settings))
+            self.device_tabs.tabBar().setTabTextColor(self.device_tabs.indexOf(device), QColor())
+
+    def request_full_sync(self, folder_name):
+        if folder_name not in self.replays:  # A replay hands over every byte it writes
+            self.transfer.request_full_sync(folder_name)
+
+    def show_alarm_events(self, device, events, active_alarms):
+        # Alarms are checked by the analysis jobs on the rows read since the last job
+        # Alarms are shown in the status bar, the alarm log and the tab color, nothing waits for the user
+        for alarm_name, active, message in events:
+            self.alarm_window.add_event(device.folder_name, active, message)
+            self.statusBar().showMessage(f"{device.folder_name}: {message}", 15000)
+        if events:
+            self.device_tabs.tabBar().setTabTextColor(self.device_tabs.indexOf(device), QColor('red') if active_alarms else QColor())
+            if any(active for alarm_name, active, message in events):
+                QApplication.alert(self)  # Flashes the taskbar entry when the window is in the background
+
+    def render_visible(self):
+        device = self.device_tabs.currentWidget()
+        if device is not None:
+            device.render_visible()
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.WindowStateChange and not self.isMinimized():
+            QTimer.singleShot(0, self.render_visible)  # Catches up on the data received while minimized
+        super().changeEvent(event)
+
+    def enter_smoothing(self):
+        smoothing = self.set_smoothing.text()
         try:
-            log_file_contents = pd.read_csv(getcwd() + '\\MonitorFiles\\Datalog.txt')  # Reads data log file as dataframe
-        except:
-            return
-        # Inflection Frequency Graph
-        self.inflection_frequency_series.clear()  # Clears data from series
-        self.s11_min_series.clear()  # Clears data from series
-        self.Inflection_Frequency_Graph.removeSeries(self.inflection_frequency_series)
-        self.Inflection_Frequency_Graph.removeSeries(self.s11_min_series)
-        inflection_frequency = log_file_contents['Inflection Frequency [Hz]'].rolling(self.smoothing).mean().tolist()  # Creates inflection frequency list
-        inflection_frequency = inflection_frequency[(self.smoothing - 1):]
-        elapsed_time_seconds = log_file_contents['Elapsed Times [s]'].tolist()  # Creates elapsed time list
-        min_s11 = log_file_contents['S11 at Inflection Frequency [dB]'].tolist()  # Creates minimum S11 list
-
-        for i in range(len(inflection_frequency)):
-            self.inflection_frequency_series.append(QPointF((elapsed_time_seconds[i + (self.smoothing - 1)] / 60), (inflection_frequency[i]) / 1e6))  # Appends all points to series
-
-        for i in range(len(elapsed_time_seconds)):
-            self.s11_min_series.append(QPointF((elapsed_time_seconds[i] / 60), min_s11[i]))
+            if int(smoothing) > 0:
+                self.smoothing = int(smoothing)
+                for device in self.devices.values():
+                    device.set_smoothing(self.smoothing_filter, self.smoothing)
+            else:
+                pass
+        except ValueError:
+            pass
+
+    def enter_smoothing_filter(self, smoothing_filter):
+        self.smoothing_filter = smoothing_filter
+        for device in self.devices.values():
+            device.set_smoothing(self.smoothing_filter, self.smoothing)
+
+
+class DeviceGraphs(QTabWidget):
+    # Data and graphs of one measurement folder
+
+    def __init__(self, folder_name, monitor_window, local_directory=None):
+        super().__init__()
+        self.folder_name = folder_name
+        self.monitor_window = monitor_window
+        # Graphs are only redrawn when their data changed (files left from the last run are drawn right away)
+        self.datalog_changed = True
+        self.sparams_changed = True
+
+        # Data log rows, smoothed values and pyramids of the folder, only used by its jobs on the analysis pool
+        self.graph_data = GraphData(DeviceAnalysis(folder_name, monitor_window.smoothing_filter, monitor_window.smoothing, local_directory))
+        self.analysis_pool = monitor_window.analysis_pool
+        # Handed to the next job
+        self.datalog_chunks = []
+        self.sparams_contents = None
+        self.smoothing = None
+        self.alarm_rules = alarm_rules(**monitor_window.alarm_settings)
+        # Every sweep received, kept for the waterfall
+        self.sweep_history = SweepHistory()
+        self.applying_frame = False  # Set while the result of a job is drawn
+
+        # Graph Properties ========================================================================
+        # X-axis used for S11 graph
+        self.frequency_axis = QValueAxis()
+        self.frequency_axis.setRange(0.85, 4)  # Sets graph from 0.85-4 GHz
+        self.frequency_axis.setLabelFormat("%0.2f")
+        self.frequency_axis.setTickType(QValueAxis.TickType.TicksFixed)
+        self.frequency_axis.setTickCount(21)
+        self.frequency_axis.setTitleText("Frequency [GHz]")
+        # Y-axis used for S11 graph
+        self.s11_mag_axis = QValueAxis()
+        self.s11_mag_axis.setRange(-50, 0)
+        self.s11_mag_axis.setLabelFormat("%0.1f")
+        self.s11_mag_axis.setTickType(QValueAxis.TickType.TicksFixed)
+        self.s11_mag_axis.setTickCount(13)
+        self.s11_mag_axis.setTitleText("S11 [dB]")
+
+        self.s11_series = QLineSeries()
+        self.s11_inflection_series = QScatterSeries()  # Inflection point found locally in the latest sweep
+        self.s11_inflection_series.setMarkerSize(8)
+
+        # Elapsed Time Axis 1
+        self.time_elapsed_axis_1 = QValueAxis()
+        self.time_elapsed_axis_1.setRange(monitor_window.time_elapsed_min, monitor_window.time_elapsed_max)
+        self.time_elapsed_axis_1.setLabelFormat("%0.1f")
+        self.time_elapsed_axis_1.setTickType(QValueAxis.TickType.TicksFixed)
+        self.time_elapsed_axis_1.setTickCount(21)
+        self.time_elapsed_axis_1.setTitleText("Time Elapsed [min]")
+
+        # Elapsed Time Axis 2
+        self.time_elapsed_axis_2 = QValueAxis()
+        self.time_elapsed_axis_2.setRange(monitor_window.time_elapsed_min, monitor_window.time_elapsed_max)
+        self.time_elapsed_axis_2.setLabelFormat("%0.1f")
+        self.time_elapsed_axis_2.setTickType(QValueAxis.TickType.TicksFixed)
+        self.time_elapsed_axis_2.setTickCount(21)
+        self.time_elapsed_axis_2.setTitleText("Time Elapsed [min]")
+
+        # Inflection Frequency Axis
+        self.inflection_frequency_axis = QValueAxis()
+        self.inflection_frequency_axis.setLabelFormat("%0.1f")
+        self.inflection_frequency_axis.setTickType(QValueAxis.TickType.TicksFixed)
+        self.inflection_frequency_axis.setTickCount(11)
+        self.inflection_frequency_axis.setTitleText("Inflection Frequency [MHz]")
+        self.inflection_frequency_axis.setRange(monitor_window.inflection_frequency_min, monitor_window.inflection_frequency_max)
+
+        # Inflection Impedance Axis
+        self.inflection_impedance_axis = QValueAxis()
+        self.inflection_impedance_axis.setLabelFormat("%0.1f")
+        self.inflection_impedance_axis.setTickType(QValueAxis.TickType.TicksFixed)
+        self.inflection_impedance_axis.setTickCount(11)
+        self.inflection_impedance_axis.setTitleText("Inflection Impedance [RE ohm]")
+        self.inflection_impedance_axis.setRange(monitor_window.inflection_impedance_min, monitor_window.inflection_impedance_max)
+
+        # Y-axis used for inflection impedance graph
+        self.s11_min_axis = QValueAxis()
+        self.s11_min_axis.setRange(-40, 0)
+        self.s11_min_axis.setLabelFormat("%d")
+        self.s11_min_axis.setTickType(QValueAxis.TickType.TicksFixed)
+        self.s11_min_axis.setTickCount(11)
+        self.s11_min_axis.setTitleText("S11 @ Inflection Frequency [dB]")
+
+        self.inflection_frequency_series = QLineSeries()
+        self.inflection_frequency_series.setName("Infection Frequency")
+        self.s11_min_series = QScatterSeries()
+        self.s11_min_series.setName("Minimum S11")
+        self.s11_min_series.setMarkerSize(2)
+        self.s11_min_series.setBorderColor(Qt.GlobalColor.transparent)
 
+        self.inflection_impedance_series = QLineSeries()
+
+        # =========================================================================================
+
+        # Graphs for Tabs =========================================================================
+        self.Inflection_Frequency_Graph = QChart()
+        self.Inflection_Frequency_Graph.setTitle('Inflection Frequency Over Time')
+        self.Inflection_Frequency_Graph.addAxis(self.s11_min_axis, Qt.AlignmentFlag.AlignRight)
+        self.Inflection_Frequency_Graph.addAxis(self.time_elapsed_axis_1, Qt.AlignmentFlag.AlignBottom)
+        self.Inflection_Frequency_Graph.addAxis(self.inflection_frequency_axis, Qt.AlignmentFlag.AlignLeft)
+
+        self.Inflection_Frequency_Graph_View = TimedChartView(self.Inflection_Frequency_Graph)
+        self.Inflection_Frequency_Graph_View.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        self.Inflection_Impedance_Graph = QChart()
+        self.Inflection_Impedance_Graph.setTitle('Inflection Impedance Over Time')
+        self.Inflection_Impedance_Graph.legend().hide()
+        self.Inflection_Impedance_Graph.addAxis(self.time_elapsed_axis_2, Qt.AlignmentFlag.AlignBottom)
+        self.Inflection_Impedance_Graph.addAxis(self.inflection_impedance_axis, Qt.AlignmentFlag.AlignLeft)
+
+        self.Inflection_Impedance_Graph_View = TimedChartView(self.Inflection_Impedance_Graph)
+        self.Inflection_Impedance_Graph_View.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        self.S11_Graph = QChart()
+        self.S11_Graph.setTitle('Lateset S11')
+        self.S11_Graph.legend().hide()
+        self.S11_Graph.addAxis(self.frequency_axis, Qt.AlignmentFlag.AlignBottom)
+        self.S11_Graph.addAxis(self.s11_mag_axis, Qt.AlignmentFlag.AlignLeft)
+
+        self.S11_Graph_View = TimedChartView(self.S11_Graph)
+        self.S11_Graph_View.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Series stay attached to their graphs, new data is moved in by the series feeds
         self.Inflection_Frequency_Graph.addSeries(self.inflection_frequency_series)  # Adds series to graph
         self.Inflection_Frequency_Graph.addSeries(self.s11_min_series)
         self.inflection_frequency_series.attachAxis(self.inflection_frequency_axis)  # Attaches both axis to the inflection frequency series
         self.inflection_frequency_series.attachAxis(self.time_elapsed_axis_1)
         self.s11_min_series.attachAxis(self.s11_min_axis)  # Attaches both axis to the minimum S11 series
         self.s11_min_series.attachAxis(self.time_elapsed_axis_1)
+        self.Inflection_Impedance_Graph.addSeries(self.inflection_impedance_series)
+        self.inflection_impedance_series.attachAxis(self.inflection_impedance_axis)
+        self.inflection_impedance_series.attachAxis(self.time_elapsed_axis_2)
+        self.S11_Graph.addSeries(self.s11_series)
+        self.s11_series.attachAxis(self.frequency_axis)
+        self.s11_series.attachAxis(self.s11_mag_axis)
+        self.S11_Graph.addSeries(self.s11_inflection_series)
+        self.s11_inflection_series.attachAxis(self.frequency_axis)
+        self.s11_inflection_series.attachAxis(self.s11_mag_axis)
+
+        self.inflection_frequency_feed = SeriesFeed(self.inflection_frequency_series, x_scale=1 / 60, y_scale=1e-6)  # Seconds to minutes and Hz to MHz
+        self.s11_min_feed = SeriesFeed(self.s11_min_series, x_scale=1 / 60)
+        self.inflection_impedance_feed = SeriesFeed(self.inflection_impedance_series, x_scale=1 / 60)
+        self.s11_feed = SeriesFeed(self.s11_series, x_scale=1e-9)  # Hz to GHz
+        self.s11_inflection_feed = SeriesFeed(self.s11_inflection_series, x_scale=1e-9)
+
+        # Every sweep received, drawn as an image (a series per sweep would be far too slow)
+        self.waterfall_view = WaterfallView(self.sweep_history, self.s11_mag_axis.min(), self.s11_mag_axis.max())
+
+        # Only the graph the user is looking at is drawn, the others are marked stale and drawn once they are shown
+        # Points of the time series are made by the analysis jobs, for the time range and width of their graph
+        self.time_series_views = {
+            self.Inflection_Frequency_Graph_View: ('Inflection Frequency', self.time_elapsed_axis_1, self.Inflection_Frequency_Graph),
+            self.Inflection_Impedance_Graph_View: ('Inflection Impedance', self.time_elapsed_axis_2, self.Inflection_Impedance_Graph),
+        }
+        self.feeds = {'inflection_frequency': self.inflection_frequency_feed, 's11_at_inflection': self.s11_min_feed, 'inflection_impedance': self.inflection_impedance_feed}
+        self.renderers = {
+            self.S11_Graph_View: self.draw_s11,
+            self.waterfall_view: self.waterfall_view.update_image,
+        }
+        self.stale = set(self.renderers) | set(self.time_series_views)  # Graphs whose data changed since they were last drawn
+        self.latest_sweep = None
+        self.auto_range_span = monitor_window.auto_range_span()
+
+        # Time series are reduced again for the visible range when the graphs are zoomed or resized
+        self.time_elapsed_axis_1.rangeChanged.connect(lambda: self.range_changed(self.Inflection_Frequency_Graph_View))
+        self.time_elapsed_axis_2.rangeChanged.connect(lambda: self.range_changed(self.Inflection_Impedance_Graph_View))
+        self.Inflection_Frequency_Graph.plotAreaChanged.connect(lambda: self.range_changed(self.Inflection_Frequency_Graph_View))
+        self.Inflection_Impedance_Graph.plotAreaChanged.connect(lambda: self.range_changed(self.Inflection_Impedance_Graph_View))
+        self.currentChanged.connect(self.render_visible)
 
-        # Inflection Impedance Graph
-        self.inflection_impedance_series.clear()  # Clears data from series
-        self.Inflection_Impedance_Graph.removeSeries(self.inflection_impedance_series)
+        # =========================================================================================
 
-        inflection_impedance = log_file_contents['Inflection Impedance [RE ohm]'].rolling(self.smoothing).mean().tolist()  # Creates inflection frequency list
-        inflection_impedance = inflection_impedance[(self.smoothing - 1):]
-        elapsed_time_seconds = log_file_contents['Elapsed Times [s]'].tolist()  # Creates elapsed time list
+        # Tabs for Different Graphs ===============================================================
+        self.addTab(self.Inflection_Frequency_Graph_View, "Inflection Frequency vs Time")
+        self.addTab(self.Inflection_Impedance_Graph_View, "Inflection Impedance vs Time")
+        self.addTab(self.S11_Graph_View, "Latest S11")
+        self.addTab(self.waterfall_view, "S11 Waterfall")
+        # =========================================================================================
 
-        for i in range(len(inflection_impedance)):
-            self.inflection_impedance_series.append(QPointF((elapsed_time_seconds[i + (self.smoothing - 1)] / 60), (inflection_impedance[i])))  # Appends all points to series
+    def set_ranges(self, time_elapsed_min, time_elapsed_max, inflection_frequency_min, inflection_frequency_max, inflection_impedance_min, inflection_impedance_max):
+        self.time_elapsed_axis_1.setRange(time_elapsed_min, time_elapsed_max)
+        self.time_elapsed_axis_2.setRange(time_elapsed_min, time_elapsed_max)
+        self.inflection_frequency_axis.setRange(inflection_frequency_min, inflection_frequency_max)
+        self.inflection_impedance_axis.setRange(inflection_impedance_min, inflection_impedance_max)
+
+    def set_auto_range(self, auto_range_span):
+        self.auto_range_span = auto_range_span
+        if auto_range_span is None:
+            self.s11_min_axis.setRange(-40, 0)  # The only axis without entries goes back to its default range
+        self.mark_stale(*self.time_series_views)  # Ranges are fitted by the next job
+
+    def set_smoothing(self, smoothing_filter, smoothing):
+        self.smoothing = (smoothing_filter, smoothing)  # Filters are recomputed once by the next job
+        self.datalog_changed = True
+
+    def set_alarm_rules(self, rules):
+        self.alarm_rules = rules  # Used from the next job on
+
+    def set_new_data(self, datalog_chunk, sparams_contents):
+        # The new bytes are kept in memory and handed to the next job
+        if datalog_chunk is not None:
+            self.datalog_chunks.append(datalog_chunk)
+        if sparams_contents is not None:
+            self.sparams_contents = sparams_contents  # Only the newest sweep is read
+        self.datalog_changed = self.datalog_changed or datalog_chunk is not None
+        self.sparams_changed = self.sparams_changed or sparams_contents is not None
 
-        self.Inflection_Impedance_Graph.addSeries(self.inflection_impedance_series)  # Adds series to graph
-        self.inflection_impedance_series.attachAxis(self.inflection_impedance_axis)  # Attaches both axis to the inflection frequency series
-        self.inflection_impedance_series.attachAxis(self.time_elapsed_axis_2)
+    def graphing_plots(self):
+        self.start_analysis()  # Also runs without new data, so the alarm for missing data can go off
 
-        try:
-            sparam_file_contents = pd.read_csv(getcwd() + '\\MonitorFiles\\Latest_Sparams.txt')  # Reads s-parameter file as dataframe
-        except:
+    def start_analysis(self):
+        # Hands what changed since the last job to a job on the analysis pool, with the time series graph to make
+        # points for when it is shown and stale. While the last job of the folder runs nothing is handed over, the
+        # next graph update (or the result of that job) starts the next one
+        if self.analysis_pool.busy(self):
+            return
+        self.analysis_pool.submit(self, self.graph_data.process, self.analysis_request(), self.apply_frame)
+
+    def analysis_request(self):
+        request = GraphRequest()
+        request.datalog_chunks, self.datalog_chunks = self.datalog_chunks, []
+        request.sparams_contents, self.sparams_contents = self.sparams_contents, None
+        request.update_time_series, self.datalog_changed = self.datalog_changed, False
+        request.update_s11, self.sparams_changed = self.sparams_changed, False
+        request.smoothing, self.smoothing = self.smoothing, None
+        request.alarm_rules, self.alarm_rules = self.alarm_rules, None
+        request.auto_range_span = self.auto_range_span
+        view = self.currentWidget()
+        if view in self.time_series_views and self.shown() and (view in self.stale or request.update_time_series):
+            request.views[self.time_series_views[view][0]] = self.draw_key(view)
+        request.now = time.time()
+        return request
+
+    def apply_frame(self, frame):
+        # Draws the result of a job on the GUI thread, the points and ranges come ready to use
+        with pipeline_metrics.measure('Chart Update'):
+            self.applying_frame = True
+            if frame.time_series_changed:
+                self.stale.update(self.time_series_views)
+            if frame.sweep is not None:
+                self.sweep_history.add(frame.sweep['frequency'], frame.sweep['s11'], frame.sweep['receive_time'])
+                self.latest_sweep = frame.sweep
+                self.stale.update((self.S11_Graph_View, self.waterfall_view))
+            if frame.ranges is not None and self.auto_range_span is not None:  # Auto range may have been turned off meanwhile
+                self.set_fitted_ranges(frame.ranges)
+            for view, (name, time_axis, graph) in self.time_series_views.items():
+                if name in frame.points:
+                    key, points = frame.points[name]
+                    for series_name, (x, y) in points.items():
+                        self.feeds[series_name].replace(x, y)
+                    if key == self.draw_key(view):  # Otherwise the graph was zoomed or resized while the job ran
+                        self.stale.discard(view)
+            self.applying_frame = False
+        if frame.full_sync_needed:
+            self.monitor_window.request_full_sync(self.folder_name)
+        self.monitor_window.show_alarm_events(self, frame.alarm_events, frame.active_alarms)
+        self.render_visible()
+
+    def set_fitted_ranges(self, ranges):
+        self.stale.update(self.time_series_views)
+        self.time_elapsed_axis_1.setRange(*ranges['time'])
+        self.time_elapsed_axis_2.setRange(*ranges['time'])
+        for value_axis, name in [(self.inflection_frequency_axis, 'inflection_frequency'), (self.s11_min_axis, 's11_at_inflection'), (self.inflection_impedance_axis, 'inflection_impedance')]:
+            if ranges[name] is not None:  # No samples in the time range, the axis is left where it is
+                value_axis.setRange(*ranges[name])
+
+    def draw_key(self, view):
+        # Time range and width the points of a time series graph are made for
+        name, time_axis, graph = self.time_series_views[view]
+        return time_axis.min(), time_axis.max(), max(int(graph.plotArea().width()), 100)
+
+    def range_changed(self, view):
+        if not self.applying_frame:  # Ranges set with the result of a job come with their points
+            self.mark_stale(view)
+
+    def mark_stale(self, *views):
+        self.stale.update(views)
+        self.render_visible()
+
+    def shown(self):
+        return self.isVisible() and not self.window().isMinimized()
+
+    def render_visible(self):
+        # Draws the shown graph if it is stale, nothing is drawn for a hidden device tab or a minimized window
+        if not self.shown():
+            return
+        view = self.currentWidget()
+        if view not in self.stale:
+            return
+        if view in self.time_series_views:
+            self.start_analysis()  # Points are made by a job and drawn when its result arrives
+            return
+        self.stale.discard(view)
+        with pipeline_metrics.measure('Chart Update'):
+            self.renderers[view]()
+
+    def draw_s11(self):
+        if self.latest_sweep is None:
             return
-        self.s11_series.clear()  # Clears data from series
-        self.S11_Graph.removeSeries(self.s11_series)  # Removes series from graph
-        frequency = sparam_file_contents['Frequency [Hz]'].tolist()  # Creates frequency list
-        s11_mag = sparam_file_contents['S11 [dB]'].tolist()  # Creates S11 magnitude list
+        self.s11_feed.replace(self.latest_sweep['frequency'], self.latest_sweep['s11'])  # Replaces all points of the series at once
+        self.s11_inflection_feed.replace(np.array([self.latest_sweep['inflection'][0]]), np.array([self.latest_sweep['inflection'][1]]))
+        self.S11_Graph.setTitle(self.latest_sweep['title'])  # Time the sweep was taken and its inflection frequency
 
-        for i in range(len(frequency)):
-            self.s11_series.append(QPointF(frequency[i] / 1e9, s11_mag[i]))  # Appends all points to series
 
-        self.S11_Graph.addSeries(self.s11_series)  # Adds series to graph
-        self.s11_series.attachAxis(self.frequency_axis)  # Attaches both axis to the series
-        self.s11_series.attachAxis(self.s11_mag_axis)
-        self.S11_Graph.setTitle(f'Antenna Reflection Data: Time Measurement was taken: {sparam_file_contents["Current Hour"][0]}:{sparam_file_contents["Current Minute"][0]}:{sparam_file_contents["Current Second"][0]}')  # Changes title based on recent inflection impedance value
+class TimedChartView(QChartView):
+    # Chart view recording how long painting the chart takes
+
+    def viewportEvent(self, event):
+        if event.type() != QEvent.Type.Paint:
+            return super().viewportEvent(event)
+        with pipeline_metrics.measure('Chart Paint'):
+            return super().viewportEvent(event)
 
-    def enter_smoothing(self):
-        smoothing = self.set_smoothing.text()
-        try:
-            int(smoothing)
-            self.smoothing = int(smoothing)
-        except ValueError:
-            pass
+
+class WaterfallView(QWidget):
+    # Every kept S11 sweep drawn as one row of an image colored by S11, the oldest sweep at the top
+    # The image uses the same ring of rows as the sweep history and a row is colored once when its sweep arrives,
+    # so a new sweep costs one row of pixels however long the history is
+    margins = (70, 30, 90, 45)  # Left, top, right and bottom space for the axes and the color scale
+    colormap_anchors = [(68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37)]  # Dark blue (low S11) to yellow (high S11)
+
+    def __init__(self, sweep_history, minimum=-50, maximum=0):
+        super().__init__()
+        self.sweep_history = sweep_history
+        self.minimum = minimum  # S11 range of the color scale in dB
+        self.maximum = maximum
+        self.colors = self.colormap(256)
+        self.color_scale = np.ascontiguousarray(self.colors[::-1].reshape(-1, 1))  # Highest S11 at the top
+        self.color_scale_image = QImage(self.color_scale.data, 1, len(self.colors), 4, QImage.Format.Format_RGB32)
+        self.pixels = np.empty((0, 0), dtype=np.uint32)
+        self.image = None  # Shares its memory with pixels
+        self.generation = None
+        self.colored = 0  # Sweeps whose row of pixels is up to date
+
+    @classmethod
+    def colormap(cls, size):
+        anchors = np.array(cls.colormap_anchors, dtype=float)
+        position = np.linspace(0, len(anchors) - 1, size)
+        rgb = np.column_stack([np.interp(position, np.arange(len(anchors)), anchors[:, channel]) for channel in range(3)]).astype(np.uint32)
+        return 0xFF000000 | (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+
+    def update_image(self):
+        history = self.sweep_history
+        if history.total == 0:
+            return
+        if history.generation != self.generation or self.pixels.shape != history.sweeps.shape:
+            self.generation = history.generation
+            self.pixels = np.zeros(history.sweeps.shape, dtype=np.uint32)
+            self.image = QImage(self.pixels.data, self.pixels.shape[1], self.pixels.shape[0], self.pixels.shape[1] * 4, QImage.Format.Format_RGB32)
+            self.colored = 0
+        rows = history.rows(max(self.colored, history.oldest()), history.total)
+        scaled = (history.sweeps[rows] - self.minimum) * ((len(self.colors) - 1) / (self.maximum - self.minimum))
+        self.pixels[rows] = self.colors[np.clip(np.nan_to_num(scaled), 0, len(self.colors) - 1).astype(np.intp)]
+        self.colored = history.total
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.white)
+        left, top, right, bottom = self.margins
+        plot = QRect(left, top, self.width() - left - right, self.height() - top - bottom)
+        history = self.sweep_history
+        count = history.count()
+        painter.drawText(QRect(0, 0, self.width(), top), Qt.AlignmentFlag.AlignCenter, f"S11 Waterfall: {count} Sweeps")
+        if self.image is None or count == 0 or plot.width() <= 0 or plot.height() <= 0:
+            return
+
+        # The oldest kept sweep is in the middle of the ring once it is full, so the image is drawn in two parts
+        first_row = history.oldest() % history.capacity
+        first_length = min(count, history.capacity - first_row)
+        drawn = 0
+        for start, length in [(first_row, first_length), (0, count - first_length)]:
+            if length > 0:
+                target = QRectF(plot.left(), plot.top() + plot.height() * drawn / count, plot.width(), plot.height() * length / count)
+                painter.drawImage(target, self.image, QRectF(0, start, self.image.width(), length))
+                drawn += length
+        painter.drawRect(plot)
+
+        # Frequency axis
+        for tick in range(5):
+            x = plot.left() + plot.width() * tick / 4
+            frequency = history.frequency[0] + (history.frequency[-1] - history.frequency[0]) * tick / 4
+            painter.drawLine(QPointF(x, plot.bottom()), QPointF(x, plot.bottom() + 4))
+            painter.drawText(QRectF(x - 40, plot.bottom() + 6, 80, 16), Qt.AlignmentFlag.AlignCenter, f"{frequency * 1e-9:.2f}")
+        painter.drawText(QRect(plot.left(), plot.bottom() + 22, plot.width(), 18), Qt.AlignmentFlag.AlignCenter, "Frequency [GHz]")
+        # Time axis, times the oldest and newest sweeps were received
+        oldest_time = history.times[first_row]
+        newest_time = history.times[(history.total - 1) % history.capacity]
+        painter.drawText(QRect(0, plot.top(), left - 6, 16), Qt.AlignmentFlag.AlignRight, time.strftime('%H:%M:%S', time.localtime(oldest_time)))
+        painter.drawText(QRect(0, plot.bottom() - 16, left - 6, 16), Qt.AlignmentFlag.AlignRight, time.strftime('%H:%M:%S', time.localtime(newest_time)))
+        # Color scale
+        scale = QRect(plot.right() + 20, plot.top(), 15, plot.height())
+        painter.drawImage(scale, self.color_scale_image)
+        painter.drawRect(scale)
+        painter.drawText(QRect(scale.right() + 4, scale.top(), right - 40, 16), Qt.AlignmentFlag.AlignLeft, f"{self.maximum:.0f} dB")
+        painter.drawText(QRect(scale.right() + 4, scale.bottom() - 16, right - 40, 16), Qt.AlignmentFlag.AlignLeft, f"{self.minimum:.0f} dB")
+
+
+class PerformanceWidget(QWidget):
+    # Percentiles and histograms of the recent times (or sizes) of each stage of the pipeline
+    columns = ["Stage", "Count", "Last", "Mean"] + [f"p{percent}" for percent in pipeline_metrics.percents] + ["Max", "Histogram"]
+    histogram_bars = "▁▂▃▄▅▆▇█"
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Performance Panel")  # Set Window Title
+        self.setWindowIcon(QIcon("Resources\\PlotIcon.png"))
+        self.resize(900, 350)  # Set Window Size
+
+        self.table = QTableWidget(0, len(self.columns))
+        self.table.setHorizontalHeaderLabels(self.columns)
+        self.table.verticalHeader().hide()
+
+        export_button = QPushButton("Export")
+        export_button.clicked.connect(self.export_metrics)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset_metrics)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(reset_button)
+        button_layout.addWidget(export_button)
+        full_layout = QVBoxLayout()
+        full_layout.addWidget(self.table)
+        full_layout.addLayout(button_layout)
+        self.setLayout(full_layout)
+
+        # The table is only refreshed while the panel is open
+        self.Refresh_Table = QTimer()
+        self.Refresh_Table.timeout.connect(self.refresh_table)
+        self.Refresh_Table.setInterval(1000)
+
+    def showEvent(self, event):
+        self.refresh_table()
+        self.Refresh_Table.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.Refresh_Table.stop()
+        super().hideEvent(event)
+
+    def refresh_table(self):
+        rows = pipeline_metrics.summary()
+        self.table.setRowCount(len(rows))
+        for row, (name, unit, count, *values, histogram) in enumerate(rows):
+            cells = [name, str(count)] + [self.format_value(value, unit) for value in values] + [self.format_histogram(histogram, unit)]
+            for column, text in enumerate(cells):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+        self.table.resizeColumnsToContents()
+
+    @staticmethod
+    def format_value(value, unit):
+        if value != value:  # Not a number
+            return ""
+        if unit == 'bytes':
+            for size_unit in ['B', 'kB', 'MB']:
+                if value < 1000:
+                    return f"{value:.0f} {size_unit}"
+                value /= 1000
+            return f"{value:.1f} GB"
+        return f"{value:.2f} {unit}"
+
+    def format_histogram(self, histogram, unit):
+        # One bar per bin between the smallest and largest bins holding values
+        used = histogram.nonzero()[0]
+        if len(used) == 0:
+            return ""
+        counts = histogram[used[0]:used[-1] + 1]
+        bars = "".join(self.histogram_bars[int((len(self.histogram_bars) - 1) * count / counts.max())] for count in counts)
+        return f"{StageMetrics.bin_edges[used[0]]:.3g} {bars} {StageMetrics.bin_edges[used[-1] + 1]:.3g} {unit}"
+
+    def export_metrics(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Performance Metrics", "Performance_Metrics.csv", "CSV Files (*.csv)")
+        if path != "":
+            pipeline_metrics.export(path)
+
+    def reset_metrics(self):
+        pipeline_metrics.reset()
+        self.refresh_table()
 
 
 class ServerFolderWidget(QWidget):
@@ -458,7 +972,7 @@ class ServerFolderWidget(QWidget):
 
         # Initial Form layout used to add label to text editor
         text_edit_layout = QFormLayout()
-        text_edit_layout.addRow("Fodler Name: ", self.line_edit)
+        text_edit_layout.addRow("Fodler Names (comma separated): ", self.line_edit)
 
         # Adding the button to receive the data input by user
         set_folder_button = QPushButton("Enter")
@@ -480,68 +994,132 @@ class ServerFolderWidget(QWidget):
             pass
 
 
-class ServerTransferThread(QThread):
-    bad_folder = Signal()
-    measurements_directory = None
+class ReplayWidget(QWidget):
+    replay = Signal(str, str, float)  # Data log, folder of sweep files (may be empty) and speed (0 = as fast as possible)
+    speeds = {"1x": 1.0, "10x": 10.0, "100x": 100.0, "As Fast As Possible": 0.0}
 
     def __init__(self):
         super().__init__()
-        # Setting Constant Variables for SSH
-        self.ssh = SSHClient()  # Defines SSH client
-        self.ssh.set_missing_host_key_policy(AutoAddPolicy())  # Adds host key if missing
-        self.sftp_session = None
-
-        # Server Access Information
-        self.server_host = User_Pass_Key.hostname
-        self.server_user = User_Pass_Key.user
-        self.server_password = User_Pass_Key.password
-        self.server_root_directory = User_Pass_Key.remote_path
-
-        self.connection_var = 0
-        self.init_err = 0
-        # Used to increment through list
-        self.numb_file = 1
-
-    def run(self):
-        if ServerTransferThread.measurements_directory is not None:
-            start_time = time.time()
-            if self.connection_var == 0:
-                try:
-                    self.ssh.connect(self.server_host, username=self.server_user, password=self.server_password)  # Establishes SSH connection
-                    self.sftp_session = self.ssh.open_sftp()  # Opens SFTP session
-                    self.connection_var = 1
-                except:
-                    print("Disconnected and can't Connect Again")
-                    return
-            else:
-                pass
+        self.setWindowTitle("Replay Recorded Run")  # Set Window Title
+        self.setWindowIcon(QIcon("Resources\\FileExplorerIcon.png"))
+        self.resize(500, 150)  # Set Window Size
+
+        # Data log and sweep folder of the run, typed in or chosen with the browse buttons
+        self.datalog_edit = QLineEdit()
+        datalog_button = QPushButton("Browse")
+        datalog_button.clicked.connect(self.browse_datalog)
+        datalog_layout = QHBoxLayout()
+        datalog_layout.addWidget(self.datalog_edit)
+        datalog_layout.addWidget(datalog_button)
+        self.sweep_folder_edit = QLineEdit()
+        sweep_folder_button = QPushButton("Browse")
+        sweep_folder_button.clicked.connect(self.browse_sweep_folder)
+        sweep_folder_layout = QHBoxLayout()
+        sweep_folder_layout.addWidget(self.sweep_folder_edit)
+        sweep_folder_layout.addWidget(sweep_folder_button)
+        self.speed_box = QComboBox()
+        self.speed_box.addItems(list(self.speeds))
+        self.speed_box.setCurrentText("10x")
+
+        form_layout = QFormLayout()
+        form_layout.addRow("Data Log: ", datalog_layout)
+        form_layout.addRow("Sweep Folder (optional): ", sweep_folder_layout)
+        form_layout.addRow("Speed: ", self.speed_box)
+
+        start_button = QPushButton("Start Replay")
+        start_button.clicked.connect(self.start_replay)
 
-            try:
-                self.sftp_session.chdir(User_Pass_Key.remote_path + ServerTransferThread.measurements_directory)  # Changes directory to specified folder on the server
-            except IOError:
-                self.bad_folder.emit()
-                return
+        full_layout = QVBoxLayout()
+        full_layout.addLayout(form_layout)
+        full_layout.addWidget(start_button)
+        self.setLayout(full_layout)
 
-            try:
-                self.sftp_session.get(User_Pass_Key.remote_path + ServerTransferThread.measurements_directory + '/' + '0_data_log.txt', getcwd()+'\\'+'MonitorFiles'+'\\'+'Datalog.txt')
-                self.sftp_session.get(User_Pass_Key.remote_path + ServerTransferThread.measurements_directory + '/' + 'Latest_Sparams.txt', getcwd()+'\\'+'MonitorFiles'+'\\'+'Latest_Sparams.txt')
-            except:
-                self.connection_var = 0
-                pass
-            end_time = time.time()
-            # print(f"Time elapsed connecting, transferring, and disconnecting to RIT server: {end_time - start_time} seconds")
+    def browse_datalog(self):
+        path = QFileDialog.getOpenFileName(self, "Data Log of the Run", "", "Text Files (*.txt);;All Files (*)")[0]
+        if path != "":
+            self.datalog_edit.setText(path)
+
+    def browse_sweep_folder(self):
+        path = QFileDialog.getExistingDirectory(self, "Folder of the Recorded Sweeps")
+        if path != "":
+            self.sweep_folder_edit.setText(path)
+
+    def start_replay(self):
+        if self.datalog_edit.text() != "":
+            self.replay.emit(self.datalog_edit.text(), self.sweep_folder_edit.text(), self.speeds[self.speed_box.currentText()])
+            self.close()
         else:
             pass
 
 
-class HelpWidget(QPdfView):
+class AlarmWidget(QWidget):
+    alarm_settings = Signal(dict)  # Keyword arguments of alarm_rules
+    log_length = 1000  # Newest alarm events kept in the log
 
     def __init__(self):
         super().__init__()
-        self.setWindowTitle("Help Document")  # Set Window Title
-        self.setWindowIcon(QIcon("HelpIcon.png"))
-        self.resize(850, 500)
-        self.help_pdf = QPdfDocument()
-        self.help_pdf.load("Resources\\GlucoseMonitoringHelp.pdf")  # Loads path of help document
-        self.setPageMode(QPdfView.PageMode.MultiPage)
-        self.setDocument(self.help_pdf)
+        self.setWindowTitle("Alarms")  # Set Window Title
+        self.setWindowIcon(QIcon("Resources\\PlotIcon.png"))
+        self.resize(500, 500)  # Set Window Size
+
+        # An empty field leaves its alarm off
+        self.frequency_min_edit = QLineEdit()
+        self.frequency_max_edit = QLineEdit()
+        self.impedance_min_edit = QLineEdit()
+        self.impedance_max_edit = QLineEdit()
+        self.frequency_change_edit = QLineEdit()
+        self.change_window_edit = QLineEdit("10")
+        self.s11_level_edit = QLineEdit()
+        self.no_data_edit = QLineEdit()
+        form_layout = QFormLayout()
+        form_layout.addRow("Inflection Frequency Min [MHz]: ", self.frequency_min_edit)
+        form_layout.addRow("Inflection Frequency Max [MHz]: ", self.frequency_max_edit)
+        form_layout.addRow("Inflection Impedance Min [ohm]: ", self.impedance_min_edit)
+        form_layout.addRow("Inflection Impedance Max [ohm]: ", self.impedance_max_edit)
+        form_layout.addRow("Inflection Frequency Drift [MHz]: ", self.frequency_change_edit)
+        form_layout.addRow("Drift Window [min]: ", self.change_window_edit)
+        form_layout.addRow("S11 at Inflection Max [dB]: ", self.s11_level_edit)
+        form_layout.addRow("No Data Timeout [s]: ", self.no_data_edit)
+
+        apply_button = QPushButton("Apply")
+        apply_button.clicked.connect(self.apply_settings)
+
+        # Alarm events, newest first
+        self.alarm_log = QListWidget()
+
+        full_layout = QVBoxLayout()
+        full_layout.addLayout(form_layout)
+        full_layout.addWidget(apply_button)
+        full_layout.addWidget(QLabel("Alarm Log"))
+        full_layout.addWidget(self.alarm_log)
+        self.setLayout(full_layout)
+
+    @staticmethod
+    def number(line_edit):
+        # Value of a field, None when it is empty (a value that is not a number is cleared)
+        try:
+            return float(line_edit.text())
+        except ValueError:
+            line_edit.setText("")
+            return None
+
+    def apply_settings(self):
+        change_window = self.number(self.change_window_edit)
+        if change_window is None or change_window <= 0:
+            change_window = 10.0
+            self.change_window_edit.setText("10")
+        self.alarm_settings.emit({
+            'frequency_range': (self.number(self.frequency_min_edit), self.number(self.frequency_max_edit)),
+            'impedance_range': (self.number(self.impedance_min_edit), self.number(self.impedance_max_edit)),
+            'frequency_change': self.number(self.frequency_change_edit),
+            'change_window': change_window,
+            's11_level': self.number(self.s11_level_edit),
+            'no_data_timeout': self.number(self.no_data_edit),
+        })
+
+    def add_event(self, folder_name, active, message):
+        self.alarm_log.insertItem(0, f"{time.strftime('%H:%M:%S')}  {folder_name}: {'ALARM' if active else 'Cleared'}  {message}")
+        if active:
+            self.alarm_log.item(0).setForeground(QColor('red'))
+        while self.alarm_log.count() > self.log_length:
+            self.alarm_log.takeItem(self.alarm_log.count() - 1)
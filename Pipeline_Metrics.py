@@ -0,0 +1,99 @@
+# Imports from python packages
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class StageMetrics:
+    # Rolling record of one stage of the pipeline: the last history_length values are kept in a ring buffer, from which
+    # percentiles and a histogram are computed when they are shown
+    # Histogram bins are spaced logarithmically, two per decade from 0.01 to 10 ** 9 in the unit of the stage
+    bin_edges = 10.0 ** np.arange(-2, 9.5, 0.5)
+
+    def __init__(self, unit='ms', history_length=1000):
+        self.unit = unit
+        self.values = np.zeros(history_length)
+        self.count = 0  # Values recorded since the start, the ring buffer holds the last history_length of them
+        self.total = 0.0
+        self.last = None
+
+    def record(self, value):
+        self.values[self.count % len(self.values)] = value
+        self.count += 1
+        self.total += value
+        self.last = value
+
+    def recent(self):
+        return self.values[:min(self.count, len(self.values))]
+
+    def percentiles(self, percents):
+        if self.count == 0:
+            return [np.nan] * len(percents)
+        return list(np.percentile(self.recent(), percents))
+
+    def histogram(self):
+        # Number of recent values in each bin, values outside the bins are counted in the first or last one
+        return np.histogram(np.clip(self.recent(), self.bin_edges[0], self.bin_edges[-1]), self.bin_edges)[0]
+
+
+class PipelineMetrics:
+    # Shared by the transfer thread, its pool and the window, so recording is guarded by a lock
+    percents = [50, 90, 99]
+
+    def __init__(self, history_length=1000):
+        self.history_length = history_length
+        self.stages = {}  # Stage name to StageMetrics, in the order the stages were first recorded
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+
+    def record(self, stage, value, unit='ms'):
+        with self.lock:
+            if stage not in self.stages:
+                self.stages[stage] = StageMetrics(unit, self.history_length)
+            self.stages[stage].record(value)
+
+    @contextmanager
+    def measure(self, stage):
+        # Records the time spent in the with block in milliseconds
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def percentile(self, stage, percent):
+        with self.lock:
+            if stage not in self.stages:
+                return None
+            return self.stages[stage].percentiles([percent])[0]
+
+    def summary(self):
+        # One row per stage: name, unit, count, last, mean, percentiles, maximum and histogram of the recent values
+        rows = []
+        with self.lock:
+            for name, stage in self.stages.items():
+                recent = stage.recent()
+                rows.append([name, stage.unit, stage.count, stage.last, stage.total / stage.count] + stage.percentiles(self.percents) + [recent.max(), stage.histogram()])
+        return rows
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+            self.start_time = time.time()
+
+    def export(self, path):
+        # Writes the summary and the histograms as CSV
+        rows = self.summary()
+        with open(path, 'w') as export_file:
+            export_file.write(f"Recorded from {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.start_time))} to {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+            export_file.write('Stage,Unit,Count,Last,Mean,' + ','.join(f'p{percent}' for percent in self.percents) + ',Max,' +
+                              ','.join(f'< {edge:.3g}' for edge in StageMetrics.bin_edges[1:]) + '\n')
+            for row in rows:
+                export_file.write(','.join(str(value) if isinstance(value, str) else f'{value:.6g}' for value in row[:-1]) + ',' +
+                                  ','.join(str(count) for count in row[-1]) + '\n')
+
+
+# Metrics of the whole application, recorded by every stage of the pipeline
+pipeline_metrics = PipelineMetrics()
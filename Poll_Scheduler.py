@@ -0,0 +1,67 @@
+# Imports from python packages
+import random
+from statistics import median
+
+
+class PollScheduler:
+    # Decides when the server is polled next
+    # While connected it learns how often the instrument writes to the data log (from the modification times of the
+    # file) and polls just after the next write is expected. While the server can't be reached it backs off
+    # exponentially with jitter so a dead server is not polled at full rate.
+    waiting = "Waiting for Folder"
+    connected = "Connected"
+    backing_off = "Backing Off"
+    stalled = "Stalled"
+    poll_margin = 0.2  # Seconds waited after the expected write before polling
+
+    def __init__(self, default_interval=3.0, min_interval=0.5, max_interval=30.0, backoff_base=2.0, backoff_max=120.0, stall_factor=5, history_length=20):
+        self.default_interval = default_interval  # Used until the write cadence is known
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stall_factor = stall_factor  # Missed writes before the data log is considered stalled
+        self.history_length = history_length
+        self.reset()
+
+    def reset(self):
+        self.state = PollScheduler.waiting
+        self.failures = 0
+        self.intervals = []  # Time between the last writes to the data log
+        self.last_write = None  # Modification time of the data log (server clock)
+        self.last_change_time = None  # Local time the last write was seen
+        self.clock_offset = None  # Smallest seen difference between the local time a write was seen and its modification time
+        self.cadence = None
+
+    def record_success(self, now, write_time=None):
+        # write_time is the modification time of the data log when new data was found, otherwise None
+        self.failures = 0
+        if write_time is not None:
+            if self.last_write is not None and write_time > self.last_write:
+                self.intervals = (self.intervals + [write_time - self.last_write])[-self.history_length:]
+                self.cadence = min(max(median(self.intervals), self.min_interval), self.max_interval)
+            self.last_write = write_time
+            self.last_change_time = now
+            self.clock_offset = now - write_time if self.clock_offset is None else min(self.clock_offset, now - write_time)
+        self.state = PollScheduler.connected
+        if self.last_change_time is not None and now - self.last_change_time > self.stall_factor * (self.cadence or self.default_interval):
+            self.state = PollScheduler.stalled
+
+    def record_failure(self, now):
+        self.failures += 1
+        self.state = PollScheduler.backing_off
+
+    def next_delay(self, now):
+        if self.state == PollScheduler.waiting:
+            return self.default_interval
+        if self.state == PollScheduler.backing_off:
+            delay = min(self.backoff_base * 2 ** (self.failures - 1), self.backoff_max)
+            return delay * random.uniform(0.5, 1.0)  # Jitter spreads the reconnection attempts
+        if self.cadence is None or self.state == PollScheduler.stalled:
+            return self.cadence or self.default_interval
+
+        # Modification times are whole seconds, so the poll is placed just after the end of the second of the next write
+        expected_write = self.last_write + self.cadence + 1 + self.clock_offset
+        if expected_write <= now:
+            return max(self.cadence / 4, self.min_interval)  # The write is late, so the server is checked again soon
+        return min(max(expected_write - now + self.poll_margin, self.min_interval), self.max_interval)
@@ -0,0 +1,120 @@
+# Imports from python packages
+import glob
+import os
+import shutil
+import time
+
+from PySide6.QtCore import Signal, QThread
+import numpy as np
+
+# Imports from other python files
+from Server_Transfer import monitor_files_directory
+from Tail_Sync import FileChunk
+
+
+def replay_folder_name(datalog_path):
+    # Name the replayed run is shown under, taken from the folder of its data log
+    return 'Replay_' + os.path.basename(os.path.dirname(os.path.abspath(datalog_path)))
+
+
+def replay_directory(folder_name):
+    # Local folder of a replayed run, replays are kept in their own folder apart from the files of the server
+    return monitor_files_directory('Replays') + '\\' + folder_name.replace('/', '_').replace('\\', '_').replace(':', '_')
+
+
+def remove_replay_directory(local_directory):
+    # Removes the files of an earlier replay, but only from a folder directly inside the replay folder
+    replays = os.path.realpath(monitor_files_directory('Replays'))
+    target = os.path.realpath(local_directory)
+    name = target[len(replays) + 1:]
+    if not target.startswith(replays + '\\') or name in ('', '.', '..') or '\\' in name or '/' in name:
+        raise ValueError(f"{local_directory} is not a replay folder")
+    shutil.rmtree(target, ignore_errors=True)
+
+
+class RecordedRun:
+    # Data log of a finished measurement and the S11 sweeps recorded during it
+    # Sweep files are in the format of Latest_Sparams.txt and are taken in name order, sweep n belongs to row n
+
+    def __init__(self, datalog_path, sweep_folder=None):
+        with open(datalog_path, 'rb') as datalog_file:
+            lines = datalog_file.read().splitlines(keepends=True)
+        self.header = lines[0]
+        self.rows = [line for line in lines[1:] if line.strip() != b'']
+        elapsed_column = self.header.decode().strip().split(',').index('Elapsed Times [s]')
+        self.elapsed_time = np.array([float(row.split(b',')[elapsed_column]) for row in self.rows])
+        self.sweeps = [] if sweep_folder is None else sorted(glob.glob(os.path.join(sweep_folder, '*.txt')))[:len(self.rows)]
+
+
+class ReplayThread(QThread):
+    # Plays a recorded run into the local files of a folder as if it came from the server, so it goes through the
+    # same parsing, analysis and graphs as live data. The run is played speed times faster than it was measured,
+    # speed 0 plays it as fast as the files can be written.
+    # Used in place of ServerTransferThread, so it has the same signals and hands the new bytes over in memory too
+    bad_folder = Signal(str)
+    new_data = Signal(str, object, object)
+    state_changed = Signal(str, str)
+    notify_interval = 0.05  # Seconds between new data signals, rows written in between are picked up together
+    wait_interval = 0.1  # Longest wait between checks for rows that are due
+
+    def __init__(self, folder_name, recorded_run, speed=1.0):
+        super().__init__()
+        self.folder_name = folder_name
+        self.recorded_run = recorded_run
+        self.speed = speed
+        self.running = False
+        self.rows_played = 0
+        # Files of an earlier replay are removed, the run starts from an empty data log
+        self.local_directory = replay_directory(folder_name)
+        remove_replay_directory(self.local_directory)
+        os.makedirs(self.local_directory, exist_ok=True)
+
+    def run(self):
+        self.running = True
+        rows = len(self.recorded_run.rows)
+        start_time = time.perf_counter()
+        last_notify = 0
+        chunk_start, chunk_rows = 0, [self.recorded_run.header]  # Data log bytes written since the last new data signal
+        sparams_contents = None
+        state = None
+        with open(self.local_directory + '\\Datalog.txt', 'wb') as datalog_file:
+            datalog_file.write(self.recorded_run.header)
+            datalog_offset = len(self.recorded_run.header)
+            while self.running and self.rows_played < rows:
+                if self.speed > 0:
+                    replay_time = self.recorded_run.elapsed_time[0] + (time.perf_counter() - start_time) * self.speed
+                    last = max(int(np.searchsorted(self.recorded_run.elapsed_time, replay_time, side='right')), self.rows_played)
+                else:
+                    last = self.rows_played + 1
+                if last > self.rows_played:
+                    datalog_file.writelines(self.recorded_run.rows[self.rows_played:last])
+                    datalog_file.flush()
+                    if len(chunk_rows) == 0:
+                        chunk_start = datalog_offset
+                    chunk_rows += self.recorded_run.rows[self.rows_played:last]
+                    datalog_offset += sum(len(row) for row in self.recorded_run.rows[self.rows_played:last])
+                    if last - 1 < len(self.recorded_run.sweeps):  # Only the newest sweep is copied, like the server overwrites it
+                        with open(self.recorded_run.sweeps[last - 1], 'rb') as sweep_file:
+                            sparams_contents = sweep_file.read()
+                        with open(self.local_directory + '\\Latest_Sparams.tmp', 'wb') as sparams_file:
+                            sparams_file.write(sparams_contents)
+                        os.replace(self.local_directory + '\\Latest_Sparams.tmp', self.local_directory + '\\Latest_Sparams.txt')
+                    self.rows_played = last
+
+                if (len(chunk_rows) > 0 or sparams_contents is not None) and (time.perf_counter() - last_notify >= self.notify_interval or self.rows_played == rows):
+                    # The first chunk starts the data log, so rows read from files of an earlier replay are dropped
+                    self.new_data.emit(self.folder_name, FileChunk(chunk_start, b''.join(chunk_rows), chunk_start == 0) if len(chunk_rows) > 0 else None, sparams_contents)
+                    chunk_rows, sparams_contents = [], None
+                    last_notify = time.perf_counter()
+                    if f"Replaying {100 * self.rows_played // rows}%" != state:
+                        state = f"Replaying {100 * self.rows_played // rows}%"
+                        self.state_changed.emit(self.folder_name, state)
+
+                if self.speed > 0 and self.rows_played < rows:
+                    next_row_time = (self.recorded_run.elapsed_time[self.rows_played] - self.recorded_run.elapsed_time[0]) / self.speed
+                    time.sleep(min(max(next_row_time - (time.perf_counter() - start_time), 0), self.wait_interval))
+        self.state_changed.emit(self.folder_name, "Replay Finished" if self.rows_played == rows else "Replay Stopped")
+
+    def stop(self):
+        self.running = False
+        self.wait()
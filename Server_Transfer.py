@@ -0,0 +1,266 @@
+# Imports from python packages
+import os
+
+from PySide6.QtCore import Signal, QThread
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from os import getcwd
+
+# Imports from other python files
+import User_Pass_Key
+from Tail_Sync import RemoteFileTailSync, RemoteFileMirror, LocalFileWriter
+from Connection_Manager import ConnectionManager
+from Poll_Scheduler import PollScheduler
+from Stream_Ingest import DatalogStream
+from Pipeline_Metrics import pipeline_metrics
+
+
+def monitor_files_directory(folder_name):
+    # Local folder where the files of a measurement folder are kept
+    return getcwd() + '\\MonitorFiles\\' + folder_name.replace('/', '_')
+
+
+class FolderSync:
+    # Transfer state of one measurement folder
+
+    def __init__(self, folder_name, writer):
+        self.folder_name = folder_name
+        os.makedirs(monitor_files_directory(folder_name), exist_ok=True)
+        # Only the bytes appended to the data log since the last transfer are downloaded
+        self.datalog_sync = RemoteFileTailSync(monitor_files_directory(folder_name) + '\\Datalog.txt', writer)
+        self.datalog_sync.resume(User_Pass_Key.remote_path + folder_name + '/' + '0_data_log.txt')
+        # The S-parameter file is rewritten after every sweep, so it is only downloaded when it changed
+        self.sparams_sync = RemoteFileMirror(monitor_files_directory(folder_name) + '\\Latest_Sparams.txt', writer)
+        # Scheduler deciding when the folder is polled next
+        self.scheduler = PollScheduler()
+        self.next_poll = 0
+        self.state = None
+        # Each file has its own SFTP channel on the shared SSH connection, so both are fetched at the same time
+        self.datalog_session = None
+        self.sparams_session = None
+        self.stream = None  # Stream following the data log in streaming mode
+
+    def streaming(self):
+        return self.stream is not None and self.stream.is_alive()
+
+    def stop_stream(self):
+        if self.stream is not None:
+            self.stream.stop()
+            if not self.stream.is_alive():
+                self.stream = None  # A stream that did not end in time is still counted as streaming, so nothing else syncs the data log
+
+    def close_sessions(self):
+        for session in (self.datalog_session, self.sparams_session):
+            if session is not None:
+                session.close()
+        self.datalog_session = None
+        self.sparams_session = None
+
+
+class ServerTransferThread(QThread):
+    bad_folder = Signal(str)
+    # Emitted with the folder name when its data log or S-parameter file changed, the new bytes are handed over in memory:
+    # the FileChunk of the data log bytes added and the contents of the new S-parameter file (None when unchanged)
+    new_data = Signal(str, object, object)
+    state_changed = Signal(str, str)  # Emitted when the connection state of a folder shown to the user changes
+
+    def __init__(self):
+        super().__init__()
+        # Server Access Information
+        self.server_host = User_Pass_Key.hostname
+        self.server_port = User_Pass_Key.port
+        self.server_user = User_Pass_Key.user
+        self.server_password = User_Pass_Key.password
+        self.server_root_directory = User_Pass_Key.remote_path
+        # SSH connection shared by all folders, kept alive between polls and replaced as soon as it dies
+        self.connection = ConnectionManager(self.server_host, self.server_port, self.server_user, self.server_password)
+
+        # Local copies of the files are written in the background, they are only read again to resume after a restart
+        self.local_writer = LocalFileWriter()
+
+        self.folders = {}  # Folder name to FolderSync
+        self.folder_names = None  # New list of folders set by the window, picked up by the thread
+        self.full_sync_names = set()  # Folders whose whole data log is downloaded again on the next poll
+        self.folder_lock = threading.Lock()
+        self.transfer_pool = ThreadPoolExecutor(max_workers=8)  # Folders and their two files are transferred in parallel
+        self.running = False
+        self.wake = threading.Event()  # Set to interrupt the wait between polls
+        self.streaming = False  # In streaming mode the data log is followed through an exec channel instead of polled
+
+    def run(self):
+        # The thread stays alive and polls each folder whenever its scheduler says new data is expected
+        self.running = True
+        while self.running:
+            self.wake.clear()  # Cleared before the folders are looked at, so a set() from here on ends the next wait
+            self.update_folders()
+            self.start_full_syncs()
+            due_folders = [folder for folder in self.folders.values() if folder.next_poll <= time.time()]
+            if len(due_folders) > 0:
+                self.transfer_files(due_folders)
+            for folder in self.folders.values():
+                if folder.scheduler.state != folder.state:
+                    folder.state = folder.scheduler.state
+                    self.state_changed.emit(folder.folder_name, folder.state)
+            next_poll = min([folder.next_poll for folder in self.folders.values()], default=time.time() + PollScheduler().default_interval)
+            self.wake.wait(max(next_poll - time.time(), 0))
+        for folder in self.folders.values():
+            folder.stop_stream()
+        self.transfer_pool.shutdown()
+        self.local_writer.shutdown()  # Waits for the local copies to be written
+        self.connection.close()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        self.wait()
+
+    def set_streaming(self, streaming):
+        self.streaming = streaming
+        self.wake.set()  # Streams are started or stopped by the thread on its next pass
+
+    def set_local_files(self, local_files):
+        # Without local copies nothing is written to disk, copies are written again in full when this is turned back on
+        self.local_writer.set_enabled(local_files)
+
+    def set_folders(self, folder_names):
+        with self.folder_lock:
+            self.folder_names = list(folder_names)
+        self.wake.set()  # Polls new folders right away
+
+    def update_folders(self):
+        with self.folder_lock:
+            folder_names, self.folder_names = self.folder_names, None
+        if folder_names is None:
+            return
+        for name in list(self.folders):
+            if name not in folder_names:
+                folder = self.folders.pop(name)
+                folder.stop_stream()
+                folder.close_sessions()
+        for name in folder_names:
+            if name not in self.folders:
+                self.folders[name] = FolderSync(name, self.local_writer)
+
+    def request_full_sync(self, folder_name):
+        # The bytes handed over missed part of the data log, so it is downloaded again and handed over as a replaced file
+        with self.folder_lock:
+            self.full_sync_names.add(folder_name)
+        self.wake.set()
+
+    def start_full_syncs(self):
+        with self.folder_lock:
+            full_sync_names, self.full_sync_names = self.full_sync_names, set()
+        for name in full_sync_names:
+            folder = self.folders.get(name)
+            if folder is None:
+                continue
+            folder.stop_stream()
+            if folder.streaming():
+                with self.folder_lock:
+                    self.full_sync_names.add(name)  # Tried again once the stream ended
+                continue
+            folder.datalog_sync.reset()  # The next sync downloads the whole file
+            folder.next_poll = time.time()
+
+    def transfer_files(self, due_folders):
+        start_time = time.time()
+        failed_folders = due_folders
+        for attempt in range(2):
+            connection_reused = self.connection.is_alive()
+            try:
+                if self.connection.connect():
+                    for folder in self.folders.values():
+                        folder.stop_stream()
+                        folder.datalog_session = None  # Channels of the old connection can't be used anymore
+                        folder.sparams_session = None
+            except:
+                print("Disconnected and can't Connect Again")
+                break
+            failed_folders = self.poll_folders(failed_folders)
+            if len(failed_folders) == 0 or not connection_reused:
+                break
+            # The connection died since the last poll (keepalives or a request timing out showed it), so it is
+            # replaced and the folders are polled again right away instead of waiting for the next poll
+
+        for folder in failed_folders:
+            folder.scheduler.record_failure(time.time())
+            folder.next_poll = time.time() + folder.scheduler.next_delay(time.time())
+        end_time = time.time()
+        pipeline_metrics.record('Poll Cycle', (end_time - start_time) * 1000)  # Time elapsed connecting and transferring all due folders
+
+    def poll_folders(self, folders):
+        # The data log and the S-parameter file of every folder are requested at the same time, each on its own SFTP
+        # channel, so a poll without new data takes about one round trip to the server
+        datalog_results = [self.transfer_pool.submit(self.transfer_datalog, folder) for folder in folders]
+        sparams_results = [self.transfer_pool.submit(self.transfer_sparams, folder) for folder in folders]
+        failed_folders = []
+        for folder, datalog_result, sparams_result in zip(folders, datalog_results, sparams_results):  # Waits for all folders
+            failed = False
+            try:
+                datalog_chunk, write_time, bad_folder = datalog_result.result()
+            except:
+                datalog_chunk, write_time, bad_folder, failed = None, None, False, True
+            try:
+                sparams_contents = sparams_result.result()
+            except:
+                sparams_contents, failed = None, True
+            # Bytes fetched are handed over even when the other file failed, they are not fetched again
+            if datalog_chunk is not None or sparams_contents is not None:
+                self.new_data.emit(folder.folder_name, datalog_chunk, sparams_contents)
+            if failed:
+                failed_folders.append(folder)
+                continue
+            if bad_folder:
+                folder.scheduler.reset()
+                folder.next_poll = time.time() + folder.scheduler.next_delay(time.time())
+                self.bad_folder.emit(folder.folder_name)
+                continue
+            folder.scheduler.record_success(time.time(), write_time)
+            folder.next_poll = time.time() + folder.scheduler.next_delay(time.time())
+            if self.streaming and not folder.streaming() and folder.datalog_sync.remote_path is not None:
+                # (Re)starts the stream from the offset reached by the last sync (a data log not written yet is polled)
+                folder.stream = DatalogStream(self.connection.transport(), folder.datalog_sync, lambda chunk, name=folder.folder_name: self.new_data.emit(name, chunk, None))
+                folder.stream.start()
+        if len(failed_folders) > 0:
+            self.connection.close()  # Channels may be left waiting for a reply, so the connection is made again
+        return failed_folders
+
+    def transfer_datalog(self, folder):
+        # Runs on the transfer pool, returns (FileChunk of new bytes or None, modification time of new data, folder does not exist)
+        if folder.datalog_session is None:
+            folder.datalog_session = self.connection.open_sftp()  # Opens SFTP session
+        remote_folder = User_Pass_Key.remote_path + folder.folder_name
+        if not self.streaming or self.local_writer.stale(folder.datalog_sync.local_path):
+            folder.stop_stream()  # A stale local copy is rewritten by a sync, the stream is started again after the poll
+        try:
+            if not folder.streaming():
+                with pipeline_metrics.measure('Data Log Transfer'):
+                    chunk = folder.datalog_sync.sync(folder.datalog_session, remote_folder + '/' + '0_data_log.txt')
+                if chunk is None:
+                    return None, None, False
+                pipeline_metrics.record('Bytes Transferred', len(chunk.data), 'bytes')
+                return chunk, folder.datalog_sync.remote_mtime, False
+            # While the stream is running, new data log rows arrive through it and only the write time is checked
+            write_time = folder.datalog_session.stat(remote_folder + '/' + '0_data_log.txt').st_mtime
+            return None, write_time if write_time != folder.scheduler.last_write else None, False
+        except FileNotFoundError:
+            # The folder itself is only looked up when its data log is missing, instead of changing into it every poll
+            try:
+                folder.datalog_session.stat(remote_folder)
+            except FileNotFoundError:
+                return None, None, True
+            return None, None, False  # The measurement has not written its data log yet
+
+    def transfer_sparams(self, folder):
+        # Runs on the transfer pool, returns the contents of the S-parameter file when it changed, otherwise None
+        if folder.sparams_session is None:
+            folder.sparams_session = self.connection.open_sftp()
+        try:
+            with pipeline_metrics.measure('S-Parameter Transfer'):
+                sparams_contents = folder.sparams_sync.sync(folder.sparams_session, User_Pass_Key.remote_path + folder.folder_name + '/' + 'Latest_Sparams.txt')
+        except FileNotFoundError:
+            return None  # No sweep written yet (a missing folder is reported by the data log transfer)
+        if sparams_contents is not None:
+            pipeline_metrics.record('Bytes Transferred', len(sparams_contents), 'bytes')
+        return sparams_contents
@@ -0,0 +1,131 @@
+# Imports from python packages
+from abc import ABC, abstractmethod
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class StreamingFilter(ABC):
+    # Smooths a growing column, only the samples added since the last update are processed
+    # Changing the window drops the output so the next update recomputes the whole column in one vectorized pass
+    initial_capacity = 4096
+
+    def __init__(self, window):
+        self.window = window
+        self.output = np.empty(self.initial_capacity)
+        self.reset()
+
+    @property
+    def start(self):
+        return self.window - 1  # Index of the first sample with a full window behind it
+
+    def reset(self):
+        self.count = 0  # Number of input samples already smoothed
+        self.source = None
+
+    def set_window(self, window):
+        if window != self.window:
+            self.window = window
+            self.reset()
+
+    def update(self, values, source=None):
+        # values holds the full column, source identifies the data set so a replaced data set is smoothed again
+        if source != self.source or len(values) < self.count:
+            self.reset()
+            self.source = source
+        if len(values) > self.count:
+            if len(values) > len(self.output):
+                grown = np.empty(max(len(values), 2 * len(self.output)))
+                grown[:self.count] = self.output[:self.count]
+                self.output = grown
+            self.output[self.count:len(values)] = self.process(values, self.count)
+            self.count = len(values)
+        return self.output[self.start:self.count]
+
+    @abstractmethod
+    def process(self, values, first):
+        # Returns the smoothed values of values[first:], the samples before first were already processed
+        pass
+
+
+class RollingMean(StreamingFilter):
+    # Keeps the running sum of the last window samples so each new sample costs one addition and one subtraction
+
+    def reset(self):
+        super().reset()
+        self.running_sum = 0.0
+        self.running_nans = 0  # Number of missing samples in the window, the mean is missing while it is above zero
+
+    def process(self, values, first):
+        new_values = values[first:]
+        new_nans = np.isnan(new_values)
+        leaving_index = np.arange(first, len(values)) - self.window
+        leaving_values = np.where(leaving_index >= 0, values[np.maximum(leaving_index, 0)], 0.0)
+        leaving_nans = np.isnan(leaving_values)
+
+        sums = self.running_sum + np.cumsum(np.where(new_nans, 0.0, new_values) - np.where(leaving_nans, 0.0, leaving_values))
+        nans = self.running_nans + np.cumsum(new_nans.astype(int) - leaving_nans.astype(int))
+        self.running_sum = float(sums[-1])
+        self.running_nans = int(nans[-1])
+        return np.where(nans > 0, np.nan, sums / self.window)
+
+
+class ExponentialMovingAverage(StreamingFilter):
+    # The window sets the span of the average (alpha = 2 / (window + 1)), missing samples hold the previous value
+
+    @property
+    def start(self):
+        return 0
+
+    def reset(self):
+        super().reset()
+        self.last_value = np.nan
+
+    def process(self, values, first):
+        new_values = np.array(values[first:], dtype=float)
+        missing = np.isnan(new_values)
+        if missing.any():  # Forward fills the missing samples
+            valid_index = np.where(missing, 0, np.arange(len(new_values)))
+            np.maximum.accumulate(valid_index, out=valid_index)
+            new_values = new_values[valid_index]
+            if np.isnan(new_values[0]):
+                new_values[np.isnan(new_values)] = self.last_value
+        if np.isnan(self.last_value):  # The average starts at the first sample that is not missing
+            valid = np.flatnonzero(~np.isnan(new_values))
+            if len(valid) == 0:
+                return new_values
+            new_values[:valid[0]] = new_values[valid[0]]
+            self.last_value = new_values[valid[0]]
+
+        alpha = 2 / (self.window + 1)
+        decay = 1 - alpha
+        output = np.empty(len(new_values))
+        # The recursion y[i] = decay * y[i - 1] + alpha * x[i] is solved in closed form over blocks short enough
+        # that decay ** -length does not overflow
+        block = len(new_values) if decay == 0 else max(1, int(500 / -np.log(decay)))
+        for block_start in range(0, len(new_values), block):
+            x = new_values[block_start:block_start + block]
+            powers = decay ** np.arange(1, len(x) + 1)
+            if decay == 0:
+                output[block_start:block_start + len(x)] = x
+            else:
+                output[block_start:block_start + len(x)] = powers * (self.last_value + alpha * np.cumsum(x / powers))
+            self.last_value = output[block_start + len(x) - 1]
+        return output
+
+
+class RollingMedian(StreamingFilter):
+    # Each new sample is the median of its own window, so the cost per sample depends on the window and not the history
+
+    def process(self, values, first):
+        window_start = max(first - self.window + 1, 0)
+        windows = sliding_window_view(values[window_start:], self.window) if len(values) - window_start >= self.window else np.empty((0, self.window))
+        medians = np.median(windows, axis=1)
+        return np.concatenate((np.full(len(values) - first - len(medians), np.nan), medians))
+
+
+smoothing_filters = {
+    'Rolling Mean': RollingMean,
+    'Exponential Moving Average': ExponentialMovingAverage,
+    'Rolling Median': RollingMedian,
+}
@@ -0,0 +1,77 @@
+# Imports from python packages
+import shlex
+import socket
+import threading
+
+# Imports from other python files
+from Pipeline_Metrics import pipeline_metrics
+
+
+class DatalogStream(threading.Thread):
+    # Follows the data log on the server through a persistent exec channel running tail, so new rows arrive as
+    # soon as they are written instead of on the next poll
+    # Bytes are added through the tail sync of the folder, so when the stream drops, polling (or the next stream)
+    # carries on from the same offset
+    read_size = 65536
+    # Messages tail prints when the file it follows was truncated or replaced
+    replaced_messages = (b'truncated', b'replaced', b'has appeared', b'inaccessible')
+
+    def __init__(self, transport, datalog_sync, new_data_callback):
+        super().__init__(daemon=True)
+        self.transport = transport
+        self.datalog_sync = datalog_sync
+        self.new_data_callback = new_data_callback  # Called from this thread with the FileChunk of the bytes added
+        self.stopped = threading.Event()
+        self.channel = None
+
+    def command(self):
+        # The bytes before the offset are sent again so the stream can check the file was only appended to
+        first_byte = self.datalog_sync.offset - len(self.datalog_sync.tail_bytes) + 1
+        return f"tail -c +{first_byte} -F -- {shlex.quote(self.datalog_sync.remote_path)}"
+
+    def stop(self, timeout=2.0):
+        # Returns once the thread ended, so the tail sync is not changed by it anymore (the channel times out every 0.5 s)
+        self.stopped.set()
+        if self.channel is not None:
+            self.channel.close()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        try:
+            self.channel = self.transport.open_session()
+            self.channel.settimeout(0.5)
+            self.channel.exec_command(self.command())
+            self.follow()
+        except Exception:
+            pass  # The stream is started again from the last offset by the transfer thread
+        finally:
+            if self.channel is not None:
+                self.channel.close()
+
+    def follow(self):
+        unverified = self.datalog_sync.tail_bytes
+        received = b''
+        while not self.stopped.is_set():
+            if self.channel.recv_stderr_ready():
+                if any(message in self.channel.recv_stderr(self.read_size) for message in self.replaced_messages):
+                    return  # The next poll notices the replaced file and downloads it again
+            try:
+                new_bytes = self.channel.recv(self.read_size)
+            except socket.timeout:
+                continue
+            if len(new_bytes) == 0:
+                return  # The channel was closed
+
+            if len(unverified) > 0:
+                received += new_bytes
+                if len(received) < len(unverified):
+                    continue
+                if received[:len(unverified)] != unverified:
+                    return  # The file does not start like the local copy anymore
+                new_bytes = received[len(unverified):]
+                unverified = b''
+            if len(new_bytes) > 0:
+                chunk = self.datalog_sync.append(new_bytes)
+                pipeline_metrics.record('Bytes Transferred', len(new_bytes), 'bytes')
+                self.new_data_callback(chunk)
@@ -0,0 +1,40 @@
+# Imports from python packages
+import numpy as np
+
+
+class SweepHistory:
+    # Keeps the last capacity S11 sweeps of a folder as the rows of one 2D array (sweep x frequency point)
+    # Rows are used as a ring, so adding a sweep copies one row and never moves the older ones
+    # When the frequency points of the sweeps change the history starts again
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self.frequency = np.empty(0)
+        self.sweeps = np.empty((0, 0), dtype=np.float32)  # Allocated with the first sweep, once its length is known
+        self.times = np.empty(self.capacity)  # Time each sweep was received
+        self.total = 0  # Sweeps added since the last reset, sweep i is kept in row i % capacity
+        self.generation = getattr(self, 'generation', -1) + 1  # Changes whenever the history starts again
+
+    def add(self, frequency, s11, receive_time):
+        if len(frequency) != len(self.frequency) or not np.array_equal(frequency, self.frequency):
+            self.reset()
+            self.frequency = np.array(frequency, dtype=float)
+            self.sweeps = np.empty((self.capacity, len(frequency)), dtype=np.float32)  # float32 halves the memory of long histories
+        row = self.total % self.capacity
+        self.sweeps[row] = s11
+        self.times[row] = receive_time
+        self.total += 1
+
+    def count(self):
+        return min(self.total, self.capacity)
+
+    def rows(self, first, last):
+        # Ring rows of sweeps first to last (numbered since the last reset, last excluded)
+        return np.arange(first, last) % self.capacity
+
+    def oldest(self):
+        # Number of the oldest sweep still kept
+        return self.total - self.count()
@@ -0,0 +1,184 @@
+# Imports from python packages
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Reads the bytes appended to a file since the last read
+# The last few bytes before the offset are read again and compared with the bytes seen last time,
+# so a file that was replaced (instead of appended to) is detected and None is returned
+def read_appended(file_object, offset, tail_bytes, end):
+    start = offset - len(tail_bytes)
+    file_object.seek(start)
+    data = file_object.read(end - start)
+    if data[:len(tail_bytes)] != tail_bytes:
+        return None
+    return data[len(tail_bytes):]
+
+
+class FileChunk:
+    # Bytes of the data log handed from the transfer thread to the graphs in memory, start is their offset in the file
+    # replaced is set when the file on the server was replaced, the bytes then start the file again
+
+    def __init__(self, start, data, replaced=False):
+        self.start = start
+        self.data = data
+        self.replaced = replaced
+
+
+class LocalFileWriter:
+    # Writes the local copies of the remote files on its own thread, so a transfer never waits for the disk
+    # The copies are only needed to resume after a restart, the graphs get the bytes in memory
+    # Rewritten files are written to a temporary file that is then renamed over the copy, so a reader sees either the
+    # old or the new file and never half of one. Appended bytes only add rows at the end, which readers parse once complete.
+    # A copy that missed bytes (writing turned off or a write error) is stale: appends are skipped until it is rewritten
+
+    def __init__(self):
+        self.enabled = True
+        self.stale_paths = set()
+        self.pool = ThreadPoolExecutor(max_workers=1)  # A single thread keeps the writes in order
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+
+    def stale(self, path):
+        # True when the copy should be rewritten before bytes can be appended to it again
+        return self.enabled and path in self.stale_paths
+
+    def append(self, path, data):
+        if not self.enabled or path in self.stale_paths:
+            self.stale_paths.add(path)
+            return
+        self.pool.submit(self.write, path, data, False)
+
+    def replace(self, path, data):
+        if not self.enabled:
+            self.stale_paths.add(path)
+            return
+        self.stale_paths.discard(path)
+        self.pool.submit(self.write, path, data, True)
+
+    def write(self, path, data, replace):
+        try:
+            if replace:
+                with open(path + '.tmp', 'wb') as local_file:
+                    local_file.write(data)
+                os.replace(path + '.tmp', path)
+            else:
+                with open(path, 'ab') as local_file:
+                    local_file.write(data)
+        except OSError:
+            self.stale_paths.add(path)  # Rewritten with the next full download
+
+    def flush(self):
+        # Waits for the writes submitted so far
+        self.pool.submit(lambda: None).result()
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+
+class RemoteFileTailSync:
+    verify_length = 64  # Number of bytes before the offset used to check that the file was only appended to
+
+    def __init__(self, local_path, writer=None):
+        self.local_path = local_path
+        self.writer = writer  # LocalFileWriter keeping the local copy, None when no copy is kept
+        self.remote_path = None
+        self.offset = 0  # Number of bytes of the remote file already fetched
+        self.tail_bytes = b''
+        self.remote_mtime = None  # Modification time of the remote file at the last sync
+        self.full_fetches = 0
+
+    def reset(self):
+        self.remote_path = None
+        self.offset = 0
+        self.tail_bytes = b''
+        self.remote_mtime = None
+
+    def resume(self, remote_path):
+        # Carries on from a local copy left by an earlier run instead of downloading the whole file again
+        # The end of the local copy is checked against the remote file as it grows, so a replaced file is still fetched in full
+        if self.writer is not None:
+            self.writer.flush()  # Writes left from an earlier sync of the same file
+        try:
+            with open(self.local_path, 'rb') as local_file:
+                self.offset = os.fstat(local_file.fileno()).st_size
+                local_file.seek(max(self.offset - self.verify_length, 0))
+                self.tail_bytes = local_file.read()
+        except OSError:
+            return
+        self.remote_path = remote_path
+
+    def sync(self, sftp_session, remote_path):
+        # Returns the FileChunk of the bytes added since the last sync, or None when there are none
+        attributes = sftp_session.stat(remote_path)
+        remote_size = attributes.st_size
+        self.remote_mtime = attributes.st_mtime
+        if remote_path != self.remote_path or remote_size < self.offset:
+            return self.full_fetch(sftp_session, remote_path, remote_size, True)  # New file or the file shrank
+        if self.writer is not None and self.writer.stale(self.local_path):
+            return self.full_fetch(sftp_session, remote_path, remote_size, False)  # Rewrites the local copy
+        if remote_size == self.offset:
+            return None  # Nothing was appended since the last sync
+
+        with sftp_session.open(remote_path, 'rb') as remote_file:
+            # Prefetch reads from the current position up to the size given, so the file is first moved to the bytes compared
+            remote_file.seek(self.offset - len(self.tail_bytes))
+            remote_file.prefetch(remote_size)  # Pipelines the read requests for the appended bytes only
+            new_bytes = read_appended(remote_file, self.offset, self.tail_bytes, remote_size)
+        if new_bytes is None:
+            return self.full_fetch(sftp_session, remote_path, remote_size, True)  # The file was replaced
+
+        return self.append(new_bytes)
+
+    def append(self, new_bytes):
+        # Adds bytes read from the end of the remote file (by sync or by a stream following the file)
+        if self.writer is not None:
+            self.writer.append(self.local_path, new_bytes)
+        chunk = FileChunk(self.offset, new_bytes)
+        self.offset += len(new_bytes)
+        self.tail_bytes = (self.tail_bytes + new_bytes)[-self.verify_length:]
+        return chunk
+
+    def full_fetch(self, sftp_session, remote_path, remote_size, replaced):
+        # Downloads the whole file, replaced is False when only the local copy is rewritten (the file did not change)
+        with sftp_session.open(remote_path, 'rb') as remote_file:
+            remote_file.prefetch(remote_size)
+            contents = remote_file.read()
+        if self.writer is not None:
+            self.writer.replace(self.local_path, contents)
+        self.remote_path = remote_path
+        self.offset = len(contents)
+        self.tail_bytes = contents[-self.verify_length:]
+        self.full_fetches += 1
+        return FileChunk(0, contents, replaced)
+
+
+class RemoteFileMirror:
+    # Downloads a file that is rewritten on the server, but only when its size or modification time changed
+
+    def __init__(self, local_path, writer=None):
+        self.local_path = local_path
+        self.writer = writer  # LocalFileWriter keeping the local copy, None when no copy is kept
+        self.remote_path = None
+        self.remote_stat = None  # (size, modification time) of the last downloaded version
+
+    def reset(self):
+        self.remote_path = None
+        self.remote_stat = None
+
+    def sync(self, sftp_session, remote_path):
+        # Returns the contents of the file when it changed since the last sync, otherwise None
+        attributes = sftp_session.stat(remote_path)
+        remote_stat = (attributes.st_size, attributes.st_mtime)
+        changed = remote_path != self.remote_path or remote_stat != self.remote_stat
+        if not changed and (self.writer is None or not self.writer.stale(self.local_path)):
+            return None
+        with sftp_session.open(remote_path, 'rb') as remote_file:
+            remote_file.prefetch(attributes.st_size)  # The size is already known, so unlike get() no second stat is sent
+            contents = remote_file.read()
+        if self.writer is not None:
+            self.writer.replace(self.local_path, contents)
+        self.remote_path = remote_path
+        self.remote_stat = remote_stat
+        return contents if changed else None
@@ -0,0 +1,188 @@
+# Local stand-in for the measurement server, used to run the monitor (polling and streaming mode) without the real server
+# Serves the files under a local folder over SFTP and answers the "tail -c +N -F -- path" command used by streaming mode
+#
+# Usage (from the repository folder): python -m Tools.Local_SSH_Server <root folder> [--port 2222] [--latency 0]
+# --latency delays the answer to every stat, open and close request by that many milliseconds, like a distant server
+# Then set hostname = 'localhost', port = 2222, user = 'monitor', password = 'monitor' and remote_path = '/' in User_Pass_Key.py
+
+# Imports from python packages
+import argparse
+import os
+import shlex
+import socket
+import threading
+import time
+
+import paramiko
+
+
+class ByteCounter:
+    # Bytes of file contents sent to the clients, so a check can make sure a transfer only reads the bytes it needs
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def add(self, count):
+        with self.lock:
+            self.count += count
+
+
+bytes_served = ByteCounter()  # Counts for every server started in this process
+
+
+class StandInServer(paramiko.ServerInterface):
+
+    def __init__(self, user, password, root, latency=0.0):
+        self.user = user
+        self.password = password
+        self.root = root
+        self.latency = latency  # Seconds added to the answer of every stat, open and close request
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if username == self.user and password == self.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        arguments = shlex.split(command.decode())
+        # Only the command sent by streaming mode is supported: tail -c +N -F -- path
+        if len(arguments) != 6 or arguments[:2] != ['tail', '-c'] or arguments[3:5] != ['-F', '--']:
+            return False
+        first_byte = int(arguments[2].lstrip('+'))
+        threading.Thread(target=follow_file, args=(channel, local_path(self.root, arguments[5]), first_byte), daemon=True).start()
+        return True
+
+
+class StandInSFTP(paramiko.SFTPServerInterface):
+    # Read only SFTP access to the files under the root folder
+
+    def __init__(self, server, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.root = server.root
+        self.latency = server.latency
+
+    def stat(self, path):
+        time.sleep(self.latency)
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(local_path(self.root, path)))
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+
+    def lstat(self, path):
+        return self.stat(path)
+
+    def list_folder(self, path):
+        try:
+            folder = local_path(self.root, path)
+            return [paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(folder, name)), name) for name in os.listdir(folder)]
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+
+    def open(self, path, flags, attr):
+        time.sleep(self.latency)
+        try:
+            handle = StandInHandle(flags)
+            handle.latency = self.latency
+            handle.readfile = open(local_path(self.root, path), 'rb')
+            handle.filename = local_path(self.root, path)
+            return handle
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+
+
+class StandInHandle(paramiko.SFTPHandle):
+
+    def read(self, offset, length):
+        data = super().read(offset, length)
+        if isinstance(data, bytes):  # Otherwise an error code
+            bytes_served.add(len(data))
+        return data
+
+    def close(self):
+        time.sleep(self.latency)
+        super().close()
+
+
+def local_path(root, remote_path):
+    return os.path.join(root, remote_path.lstrip('/'))
+
+
+def follow_file(channel, path, first_byte):
+    # Behaves like tail -F: sends the file from first_byte on, then whatever is appended to it
+    position = first_byte - 1
+    try:
+        while not channel.closed:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                time.sleep(0.1)
+                continue
+            if size < position:
+                channel.sendall_stderr(b"tail: file truncated\n")
+                position = 0
+            if size > position:
+                with open(path, 'rb') as followed_file:
+                    followed_file.seek(position)
+                    new_bytes = followed_file.read(size - position)
+                channel.sendall(new_bytes)
+                position += len(new_bytes)
+            else:
+                time.sleep(0.05)
+    except (OSError, EOFError, paramiko.SSHException):
+        pass  # The client closed the channel
+    finally:
+        channel.close()
+
+
+def serve_connection(client_socket, host_key, server):
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Answers on several channels are not held back
+    transport = paramiko.Transport(client_socket)
+    transport.add_server_key(host_key)
+    transport.set_subsystem_handler('sftp', paramiko.SFTPServer, StandInSFTP)
+    transport.start_server(server=server)
+
+
+def start_server(root, port=2222, user='monitor', password='monitor', host='127.0.0.1', latency=0.0):
+    # Starts accepting connections in a background thread and returns the listening socket (close it to stop)
+    host_key = paramiko.RSAKey.generate(2048)
+    listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listen_socket.bind((host, port))
+    listen_socket.listen(16)
+
+    def accept_connections():
+        while True:
+            try:
+                client_socket, _ = listen_socket.accept()
+            except OSError:
+                return  # The listening socket was closed
+            serve_connection(client_socket, host_key, StandInServer(user, password, root, latency))
+
+    threading.Thread(target=accept_connections, daemon=True).start()
+    return listen_socket
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local SSH/SFTP stand-in for the measurement server")
+    parser.add_argument('root', help="Folder served as the server file system")
+    parser.add_argument('--port', type=int, default=2222)
+    parser.add_argument('--user', default='monitor')
+    parser.add_argument('--password', default='monitor')
+    parser.add_argument('--latency', type=float, default=0, help="Milliseconds added to every stat, open and close request")
+    arguments = parser.parse_args()
+    start_server(os.path.abspath(arguments.root), arguments.port, arguments.user, arguments.password, latency=arguments.latency / 1000)
+    print(f"Serving {arguments.root} on port {arguments.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
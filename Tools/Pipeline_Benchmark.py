@@ -0,0 +1,280 @@
+# Times the stages of the monitor (transfer, parse, analysis and render) on synthetic measurement folders of growing size,
+# so the effect of a change can be measured without the real server. Files are served by the local server stand-in.
+#
+# Usage (from the repository folder): python -m Tools.Pipeline_Benchmark [--hours 1,6,24,72] [--interval 3] [--points 1001] [--no-render] [--output results.csv]
+#                                     [--latency 0]
+# --latency makes the server stand-in answer stat, open and close requests that many milliseconds late, like a distant server
+# Without a display set QT_QPA_PLATFORM=offscreen (or use --no-render)
+
+# Imports from python packages
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Imports from other python files
+from Tail_Sync import RemoteFileTailSync, RemoteFileMirror, LocalFileWriter, FileChunk
+from Connection_Manager import ConnectionManager
+from Datalog_Store import DatalogStore
+from History_Cache import HistoryCache
+from Smoothing_Engine import RollingMean
+from Decimation import MinMaxPyramid
+from Tools.Local_SSH_Server import start_server, bytes_served
+from Tools.Synthetic_Data import write_folder, write_datalog, write_sparams
+
+benchmark_folder = 'Pipeline_Benchmark'
+
+
+def best_time(function, repeat, prepare=None):
+    # Fastest of repeat calls in milliseconds, prepare is called (untimed) before each call
+    best = float('inf')
+    for _ in range(repeat):
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def transfer_stages(sftp_sessions, remote_folder, local_folder, measurement, repeat):
+    results = {}
+    sftp_session = sftp_sessions[0]
+    writer = LocalFileWriter()  # Local copies are written in the background like in the application
+    datalog_sync = RemoteFileTailSync(os.path.join(local_folder, 'Datalog.txt'), writer)
+    sparams_sync = RemoteFileMirror(os.path.join(local_folder, 'Latest_Sparams.txt'), writer)
+    remote_datalog = '/' + benchmark_folder + '/0_data_log.txt'
+    results['Transfer: Full Data Log'] = best_time(lambda: datalog_sync.sync(sftp_session, remote_datalog), repeat, datalog_sync.reset)
+    results['Transfer: Poll Without Change'] = best_time(lambda: datalog_sync.sync(sftp_session, remote_datalog), repeat)
+    results['Transfer: Poll With New Row'] = best_time(lambda: datalog_sync.sync(sftp_session, remote_datalog), repeat,
+                                                       lambda: write_datalog(os.path.join(remote_folder, '0_data_log.txt'), measurement, 1, append=True))
+    results['Transfer: S-Parameter File'] = best_time(lambda: sparams_sync.sync(sftp_session, '/' + benchmark_folder + '/Latest_Sparams.txt'), repeat, sparams_sync.reset)
+
+    # A poll of both files without new data, one file after the other on one channel or at the same time on two
+    def poll(datalog_session, sparams_session):
+        datalog_sync.sync(datalog_session, remote_datalog)
+        sparams_sync.sync(sparams_session, '/' + benchmark_folder + '/Latest_Sparams.txt')
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        def parallel_poll():
+            datalog_result = pool.submit(datalog_sync.sync, sftp_sessions[0], remote_datalog)
+            sparams_result = pool.submit(sparams_sync.sync, sftp_sessions[1], '/' + benchmark_folder + '/Latest_Sparams.txt')
+            datalog_result.result(), sparams_result.result()
+
+        results['Transfer: Poll Both Files (One Channel)'] = best_time(lambda: poll(sftp_session, sftp_session), repeat)
+        results['Transfer: Poll Both Files (Two Channels)'] = best_time(parallel_poll, repeat)
+    for rows in (1, 10000):
+        check_bytes_served(datalog_sync, sftp_session, remote_folder, measurement, rows)
+    writer.shutdown()  # The local copies are read by the parse stages
+    return results
+
+
+def check_bytes_served(datalog_sync, sftp_session, remote_folder, measurement, rows):
+    # A poll after rows were appended may only read the new bytes and the bytes compared before them from the server
+    remote_datalog = '/' + benchmark_folder + '/0_data_log.txt'
+    write_datalog(os.path.join(remote_folder, '0_data_log.txt'), measurement, rows, append=True)
+    expected = os.path.getsize(os.path.join(remote_folder, '0_data_log.txt')) - datalog_sync.offset + len(datalog_sync.tail_bytes)
+    served = bytes_served.count
+    datalog_sync.sync(sftp_session, remote_datalog)
+    served = bytes_served.count - served
+    if served != expected:
+        print(f"Check failed: a poll after {rows} new rows read {served} bytes from the server instead of {expected}", file=sys.stderr)
+
+
+def append_row(path, measurement):
+    # Appends a row to a local data log and returns its bytes as the transfer thread hands them over
+    start = os.path.getsize(path)
+    write_datalog(path, measurement, 1, append=True)
+    with open(path, 'rb') as log_file:
+        log_file.seek(start)
+        return FileChunk(start, log_file.read())
+
+
+def parse_stages(local_folder, measurement, repeat):
+    results = {}
+    path = os.path.join(local_folder, 'Datalog.txt')
+    cache_folder = os.path.join(local_folder, 'History')
+    results['Parse: Full Data Log'] = best_time(lambda: DatalogStore(path).update(), repeat)
+    shutil.rmtree(cache_folder, ignore_errors=True)
+    DatalogStore(path, HistoryCache(cache_folder, DatalogStore.columns)).update()  # Writes the cache
+    results['Parse: History Cache Load'] = best_time(lambda: DatalogStore(path, HistoryCache(cache_folder, DatalogStore.columns)), repeat)
+
+    store = DatalogStore(path)
+    store.update()
+    # A new row read back from the local file, or parsed from the bytes handed over in memory
+    results['Parse: New Row (Local File)'] = best_time(store.update, repeat, lambda: append_row(path, measurement))
+    chunks = []
+    results['Parse: New Row (In Memory)'] = best_time(lambda: store.feed(chunks.pop()), repeat, lambda: chunks.append(append_row(path, measurement)))
+    frequency = store.view('inflection_frequency')
+    results['Analysis: Rolling Mean (Full)'] = best_time(lambda: RollingMean(10).update(frequency), repeat)
+    results['Analysis: Min/Max Pyramid (Full)'] = best_time(lambda: MinMaxPyramid().update(frequency), repeat)
+    pyramid = MinMaxPyramid()
+    pyramid.update(frequency)
+    window = slice(len(frequency) // 4, len(frequency))  # Extent of the last three quarters of the data log
+    results['Analysis: Window Extent (Pyramid)'] = best_time(lambda: pyramid.extent(window.start, window.stop), repeat)
+    results['Analysis: Window Extent (Scan)'] = best_time(lambda: (np.nanmin(frequency[window]), np.nanmax(frequency[window])), repeat)
+    return results
+
+
+def render_stages(app, window, local_folder, measurement, hours, repeat):
+    from PySide6.QtCore import QEventLoop
+    from Monitoring_MainWindow import DeviceGraphs
+    from Server_Transfer import monitor_files_directory
+    results = {}
+    device_folder = monitor_files_directory(benchmark_folder)
+    shutil.rmtree(device_folder, ignore_errors=True)
+    os.makedirs(device_folder)
+    shutil.copy(os.path.join(local_folder, 'Datalog.txt'), device_folder + '\\Datalog.txt')
+    shutil.copy(os.path.join(local_folder, 'Latest_Sparams.txt'), device_folder + '\\Latest_Sparams.txt')
+    window.time_elapsed_max = hours * 60  # The whole run is visible
+    window.inflection_frequency_min, window.inflection_frequency_max = 1150, 1350
+
+    def new_device():
+        device = DeviceGraphs(benchmark_folder, window)
+        window.device_tabs.addTab(device, benchmark_folder)
+        app.processEvents()
+        return device
+
+    def remove_device(device):
+        window.device_tabs.removeTab(window.device_tabs.indexOf(device))
+        device.deleteLater()
+        app.processEvents()
+
+    def wait_for(device):
+        # Parsing and analysis run on the analysis pool, the stage ends once the result is drawn
+        while window.analysis_pool.busy(device) or len(window.analysis_pool.results) > 0:
+            app.processEvents(QEventLoop.ProcessEventsFlag.WaitForMoreEvents)  # Sleeps until the job posts its result
+
+    devices = []
+
+    def first_update():
+        devices.append(new_device())
+        devices[-1].start_analysis()
+        wait_for(devices[-1])
+
+    def remove_devices(clear_cache):
+        while devices:
+            remove_device(devices.pop())
+        if clear_cache:
+            shutil.rmtree(device_folder + '\\History', ignore_errors=True)
+
+    # The first update of a new device parses the whole data log, later starts load the history cache
+    results['Render: First Update (No Cache)'] = best_time(first_update, repeat, lambda: remove_devices(True))
+    results['Render: First Update (Cached)'] = best_time(first_update, repeat, lambda: remove_devices(False))
+    device = devices[-1]
+
+    def update_s11():
+        device.draw_s11()
+        device.S11_Graph_View.grab()
+
+    def new_row():
+        device.set_new_data(append_row(device_folder + '\\Datalog.txt', measurement), None)
+
+    def new_row_and_sweep():
+        # New data handed to the device like the transfer thread does
+        chunk = append_row(device_folder + '\\Datalog.txt', measurement)
+        elapsed_time, frequency = chunk.data.split(b',')[:2]
+        write_sparams(device_folder + '\\Latest_Sparams.txt', measurement, len(device.sweep_history.frequency), float(frequency), float(elapsed_time))
+        with open(device_folder + '\\Latest_Sparams.txt', 'rb') as sparams_file:
+            device.set_new_data(chunk, sparams_file.read())
+
+    def update():
+        device.start_analysis()
+        wait_for(device)
+
+    def redraw_visible_range():
+        device.mark_stale(device.Inflection_Frequency_Graph_View)
+        wait_for(device)
+
+    def graph_update_tick():
+        # Everything the window does on a graph update with new data, including painting the shown graph
+        device.graphing_plots()
+        wait_for(device)
+        app.processEvents()
+
+    # Work left on the GUI thread: handing the new data to a job and drawing the result of the job
+    frames = []
+    results['Render: Update With New Row'] = best_time(update, repeat, new_row)
+    results['Render: Hand Over New Row (GUI Thread)'] = best_time(device.start_analysis, repeat, lambda: (wait_for(device), new_row()))
+    wait_for(device)
+    results['Render: Analysis Job With New Row'] = best_time(lambda: frames.append(device.graph_data.process(device.analysis_request())), repeat, new_row)
+    results['Render: Apply Result (GUI Thread)'] = best_time(lambda: device.apply_frame(frames.pop()), repeat)
+    results['Render: Redraw Visible Range'] = best_time(redraw_visible_range, repeat)
+    results['Render: Paint Time Series Chart'] = best_time(device.Inflection_Frequency_Graph_View.grab, repeat)
+    results['Render: S11 Update and Paint'] = best_time(update_s11, repeat)
+    results['Render: Graph Update Tick'] = best_time(graph_update_tick, repeat, new_row_and_sweep)
+    device.set_auto_range(60)
+    results['Render: Graph Update Tick (Auto Range)'] = best_time(graph_update_tick, repeat, new_row_and_sweep)
+    device.set_auto_range(None)
+    remove_device(device)
+    shutil.rmtree(device_folder, ignore_errors=True)
+    return results
+
+
+def run_benchmark(hours_list, interval, points, repeat, render, output, latency=0.0):
+    temporary_folder = tempfile.mkdtemp()
+    remote_root = os.path.join(temporary_folder, 'remote')
+    remote_folder = os.path.join(remote_root, benchmark_folder)
+    local_folder = os.path.join(temporary_folder, 'local')
+    os.makedirs(local_folder)
+
+    listen_socket = start_server(remote_root, 0, latency=latency)  # Port 0 picks a free port
+    connection = ConnectionManager('127.0.0.1', listen_socket.getsockname()[1], 'monitor', 'monitor')
+    connection.connect()
+    sftp_sessions = [connection.open_sftp(), connection.open_sftp()]
+
+    app = window = None
+    if render:
+        from PySide6.QtWidgets import QApplication
+        from Monitoring_MainWindow import MonitorWindow
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+        window = MonitorWindow(app)
+        window.show()
+
+    results = {}
+    try:
+        for hours in hours_list:
+            measurement = write_folder(remote_folder, hours, interval, points)
+            print(f"{hours} h: {measurement.rows} rows, {os.path.getsize(os.path.join(remote_folder, '0_data_log.txt')) / 1e6:.1f} MB", file=sys.stderr)
+            results[hours] = transfer_stages(sftp_sessions, remote_folder, local_folder, measurement, repeat)
+            results[hours].update(parse_stages(local_folder, measurement, repeat))
+            if render:
+                results[hours].update(render_stages(app, window, local_folder, measurement, hours, repeat))
+    finally:
+        for sftp_session in sftp_sessions:
+            sftp_session.close()
+        connection.close()
+        listen_socket.close()
+        if window is not None:
+            window.close()
+        shutil.rmtree(temporary_folder, ignore_errors=True)
+
+    stages = list(next(iter(results.values())))
+    print(f"Best of {repeat} runs in milliseconds, {interval} s between rows, {points} points per sweep")
+    print(f"{'Stage':<44}" + ''.join(f"{str(hours) + ' h':>12}" for hours in hours_list))
+    for stage in stages:
+        print(f"{stage:<44}" + ''.join(f"{results[hours][stage]:>12.2f}" for hours in hours_list))
+    if output is not None:
+        with open(output, 'w') as output_file:
+            output_file.write('Stage,' + ','.join(f"{hours} h" for hours in hours_list) + '\n')
+            for stage in stages:
+                output_file.write(stage + ',' + ','.join(f"{results[hours][stage]:.3f}" for hours in hours_list) + '\n')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Times the transfer, parse, analysis and render stages of the monitor")
+    parser.add_argument('--hours', default='1,6,24,72', help="Comma separated lengths of the data logs in hours")
+    parser.add_argument('--interval', type=float, default=3, help="Seconds between rows")
+    parser.add_argument('--points', type=int, default=1001, help="Points per S11 sweep")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-render', action='store_true', help="Skip the stages that need Qt")
+    parser.add_argument('--output', help="CSV file the results are written to")
+    parser.add_argument('--latency', type=float, default=0, help="Milliseconds the server stand-in waits before answering a request")
+    arguments = parser.parse_args()
+    run_benchmark([float(hours) for hours in arguments.hours.split(',')], arguments.interval, arguments.points, arguments.repeat, not arguments.no_render, arguments.output,
+                  arguments.latency / 1000)
@@ -0,0 +1,73 @@
+# Finds the inflection point of every sweep of a recorded run again, for example with other smoothing or another
+# frequency range, and writes the results as CSV. Sweeps are files in the format of Latest_Sparams.txt.
+# With --datalog the results are compared with the values computed on the server (sweep n against data log row n).
+#
+# Usage (from the repository folder): python -m Tools.Reprocess_Sweeps <sweep files or folders> [--smoothing 1]
+#                                     [--min-frequency Hz] [--max-frequency Hz] [--datalog 0_data_log.txt] [--output results.csv]
+
+# Imports from python packages
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Imports from other python files
+from Inflection_Analytics import InflectionAnalyzer
+
+
+def sweep_files(paths):
+    # Files given directly, plus the .txt files of the folders given, in name order
+    files = []
+    for path in paths:
+        files += sorted(glob.glob(os.path.join(path, '*.txt'))) if os.path.isdir(path) else [path]
+    return files
+
+
+def read_sweeps(files):
+    # Returns the frequency points and one row of S11 per sweep (all sweeps must use the same frequency points)
+    frequency = None
+    sweeps = []
+    for path in files:
+        sweep = pd.read_csv(path, usecols=['Frequency [Hz]', 'S11 [dB]'])
+        if frequency is None:
+            frequency = sweep['Frequency [Hz]'].to_numpy(dtype=float)
+        elif not np.array_equal(frequency, sweep['Frequency [Hz]'].to_numpy(dtype=float)):
+            raise ValueError(f"{path} does not use the same frequency points as {files[0]}")
+        sweeps.append(sweep['S11 [dB]'].to_numpy(dtype=float))
+    return frequency, np.array(sweeps)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Finds the inflection point of recorded S11 sweeps")
+    parser.add_argument('paths', nargs='+', help="Sweep files or folders holding them")
+    parser.add_argument('--smoothing', type=int, default=1, help="Points averaged along each sweep")
+    parser.add_argument('--min-frequency', type=float, help="Lowest frequency searched in Hz")
+    parser.add_argument('--max-frequency', type=float, help="Highest frequency searched in Hz")
+    parser.add_argument('--bandwidth-level', type=float, default=3, help="dB above the minimum where the bandwidth is measured")
+    parser.add_argument('--datalog', help="Data log of the run, to compare with the values computed on the server")
+    parser.add_argument('--output', default='Reprocessed_Sweeps.csv')
+    arguments = parser.parse_args()
+
+    files = sweep_files(arguments.paths)
+    start_time = time.perf_counter()
+    frequency, sweeps = read_sweeps(files)
+    read_time = time.perf_counter() - start_time
+    analyzer = InflectionAnalyzer(arguments.smoothing, arguments.min_frequency, arguments.max_frequency, arguments.bandwidth_level)
+    start_time = time.perf_counter()
+    results = analyzer.analyze(frequency, sweeps)
+    analysis_time = time.perf_counter() - start_time
+    print(f"{len(files)} sweeps of {len(frequency)} points: read in {read_time:.2f} s, analyzed in {analysis_time:.3f} s")
+
+    output = pd.DataFrame({'Sweep File': [os.path.basename(path) for path in files], **results})
+    if arguments.datalog is not None:
+        server = pd.read_csv(arguments.datalog, usecols=['Inflection Frequency [Hz]', 'S11 at Inflection Frequency [dB]'])
+        rows = min(len(server), len(output))
+        output['Server Inflection Frequency [Hz]'] = np.nan
+        output.loc[:rows - 1, 'Server Inflection Frequency [Hz]'] = server['Inflection Frequency [Hz]'].to_numpy(dtype=float)[:rows]
+        difference = output['Inflection Frequency [Hz]'] - output['Server Inflection Frequency [Hz]']
+        print(f"Difference to the server: mean {difference.mean() * 1e-6:.3f} MHz, largest {difference.abs().max() * 1e-6:.3f} MHz over {rows} sweeps")
+    output.to_csv(arguments.output, index=False)
+    print(f"Results written to {arguments.output}")
@@ -0,0 +1,84 @@
+# Measures how long the application takes to start: each run starts a new Python process which imports the main
+# window, builds it and records when it is first painted. The times are counted from the moment the process was started.
+#
+# Usage (from the repository folder): python -m Tools.Startup_Benchmark [--runs 10] [--eager]
+# --eager imports the modules the application only loads on first use (PDF viewer, SSH stack, pandas) before building
+# the window, which shows what starting the application costs without lazy loading
+
+# Imports from python packages
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules the application should not load before the window is first painted
+deferred_modules = ['PySide6.QtPdf', 'PySide6.QtPdfWidgets', 'paramiko', 'pandas']
+stages = ['Python Started', 'Imports Done', 'Window Built', 'First Paint']
+
+
+def run_child(launch_time, eager):
+    # Runs in the benchmark process, prints the time of each stage (in seconds since launch) as JSON
+    times = {'Python Started': time.perf_counter() - launch_time}
+    if eager:
+        for name in deferred_modules:
+            try:
+                __import__(name)
+            except ImportError:
+                pass  # Not installed, nothing to load
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QObject, QEvent, QTimer
+    from Monitoring_MainWindow import MonitorWindow
+    times['Imports Done'] = time.perf_counter() - launch_time
+
+    class FirstPaint(QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Type.Paint and 'First Paint' not in times:
+                times['First Paint'] = time.perf_counter() - launch_time
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    app = QApplication(sys.argv[:1])
+    first_paint = FirstPaint()
+    app.installEventFilter(first_paint)
+    window = MonitorWindow(app)
+    times['Window Built'] = time.perf_counter() - launch_time
+    window.show()
+    QTimer.singleShot(10000, app.quit)  # Gives up if the window is never painted
+    app.exec()
+    window.close()
+
+    loaded = [name for name in deferred_modules if name in sys.modules]
+    print(json.dumps({'times': times, 'loaded': loaded}))
+
+
+def run_benchmark(runs, eager):
+    repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = []
+    for _ in range(runs):
+        launch_time = time.perf_counter()  # perf_counter is shared by all processes on Windows and Linux
+        command = [sys.executable, '-m', 'Tools.Startup_Benchmark', '--child', repr(launch_time)] + (['--eager'] if eager else [])
+        output = subprocess.run(command, cwd=repository, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{runs} runs{' (eager imports)' if eager else ''}, milliseconds since the process was started")
+    print(f"{'Stage':<16}{'Median':>10}{'Min':>10}{'Max':>10}")
+    for stage in stages:
+        values = [result['times'][stage] * 1000 for result in results if stage in result['times']]
+        if values:
+            print(f"{stage:<16}{statistics.median(values):>10.1f}{min(values):>10.1f}{max(values):>10.1f}")
+    print(f"Loaded before first paint: {', '.join(results[-1]['loaded']) or 'none of ' + ', '.join(deferred_modules)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Startup time of the monitoring application")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--eager', action='store_true', help="Import the lazily loaded modules before building the window")
+    parser.add_argument('--child', type=float, help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+    if arguments.child is not None:
+        run_child(arguments.child, arguments.eager)
+    else:
+        run_benchmark(arguments.runs, arguments.eager)
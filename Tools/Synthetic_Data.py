@@ -0,0 +1,116 @@
+# Writes measurement folders that look like the ones written on the server: a 0_data_log.txt with one row per sweep
+# and a Latest_Sparams.txt with the last S11 sweep. Used by the benchmarks and to run the monitor against the local
+# server stand-in (Tools/Local_SSH_Server.py).
+#
+# Usage (from the repository folder): python -m Tools.Synthetic_Data <folder> [--hours 24] [--interval 3] [--points 1001] [--follow] [--sweeps]
+# --follow keeps adding a row and a new sweep every interval, like the instrument does during a measurement
+# --sweeps also writes every sweep of the run to <folder>/Sweeps, for replaying or reprocessing the run
+
+# Imports from python packages
+import argparse
+import os
+import time
+
+import numpy as np
+
+datalog_header = ['Elapsed Times [s]', 'Inflection Frequency [Hz]', 'Inflection Impedance [RE ohm]', 'S11 at Inflection Frequency [dB]', 'Current Hour', 'Current Minute', 'Current Second']
+datalog_formats = ['%.1f', '%.0f', '%.4f', '%.4f', '%d', '%d', '%d']
+sparams_header = ['Frequency [Hz]', 'S11 [dB]', 'Current Hour', 'Current Minute', 'Current Second']
+sparams_formats = ['%.0f', '%.4f', '%d', '%d', '%d']
+
+
+class SyntheticMeasurement:
+    # Slowly drifting resonance with noise and occasional steps, the same random seed always gives the same run
+
+    def __init__(self, interval=3.0, seed=0, start_frequency=0.85e9, stop_frequency=4e9):
+        self.interval = interval  # Seconds between sweeps
+        self.random = np.random.default_rng(seed)
+        self.start_frequency = start_frequency
+        self.stop_frequency = stop_frequency
+        self.start_clock = 8 * 3600  # Clock time of the first sweep (08:00:00)
+        self.rows = 0
+
+    def datalog_rows(self, count):
+        # Returns the next count rows of the data log as columns
+        elapsed = (self.rows + np.arange(count)) * self.interval
+        drift = 30e6 * np.sin(2 * np.pi * elapsed / 86400) + 5e6 * np.sin(2 * np.pi * elapsed / 3600)
+        steps = np.cumsum(self.random.random(count) < 0.001) * 2e6  # Sudden shifts, for example when the sample changes
+        frequency = 1250e6 + drift + steps + self.random.normal(0, 0.5e6, count)
+        impedance = 50 + 5 * np.sin(2 * np.pi * elapsed / 7200) + self.random.normal(0, 0.3, count)
+        s11 = -20 + 2 * np.sin(2 * np.pi * elapsed / 5400) + self.random.normal(0, 0.2, count)
+        clock = (self.start_clock + elapsed).astype(np.int64)
+        self.rows += count
+        return [elapsed, frequency, impedance, s11, clock // 3600 % 24, clock // 60 % 60, clock % 60]
+
+    def sweep(self, points, inflection_frequency, elapsed):
+        # S11 sweep with a resonance dip at the inflection frequency
+        frequency = np.linspace(self.start_frequency, self.stop_frequency, points)
+        width = 40e6
+        s11 = -3 - 22 / (1 + ((frequency - inflection_frequency) / width) ** 2) + self.random.normal(0, 0.1, points)
+        clock = int(self.start_clock + elapsed)
+        return [frequency, s11, np.full(points, clock // 3600 % 24), np.full(points, clock // 60 % 60), np.full(points, clock % 60)]
+
+
+def format_rows(columns, formats):
+    # Formats columns as CSV rows (without header), the way the server writes them
+    row_format = ','.join(formats) + '\n'
+    return ''.join(row_format % row for row in zip(*(column.tolist() for column in columns)))
+
+
+def write_datalog(path, measurement, count, append=False):
+    with open(path, 'a' if append else 'w', newline='') as datalog_file:
+        if not append:
+            datalog_file.write(','.join(datalog_header) + '\n')
+        columns = measurement.datalog_rows(count)
+        datalog_file.write(format_rows(columns, datalog_formats))
+    return columns
+
+
+def write_sparams(path, measurement, points, inflection_frequency, elapsed):
+    # The server rewrites the whole file after every sweep, so it is written to a temporary file and moved in place
+    with open(path + '.tmp', 'w', newline='') as sparams_file:
+        sparams_file.write(','.join(sparams_header) + '\n')
+        sparams_file.write(format_rows(measurement.sweep(points, inflection_frequency, elapsed), sparams_formats))
+    os.replace(path + '.tmp', path)
+
+
+def write_folder(folder, hours=24.0, interval=3.0, points=1001, seed=0, sweeps=False):
+    # Writes a measurement folder holding the given hours of data, returns the measurement to continue it
+    os.makedirs(folder, exist_ok=True)
+    measurement = SyntheticMeasurement(interval, seed)
+    columns = write_datalog(os.path.join(folder, '0_data_log.txt'), measurement, int(hours * 3600 / interval))
+    if sweeps:  # One file per row of the data log, named so they sort in the order they were measured
+        os.makedirs(os.path.join(folder, 'Sweeps'), exist_ok=True)
+        for row, (elapsed, inflection_frequency) in enumerate(zip(columns[0], columns[1])):
+            write_sparams(os.path.join(folder, 'Sweeps', f'Sparams_{row:06d}.txt'), measurement, points, inflection_frequency, elapsed)
+    last_frequency = columns[1][-1] if len(columns[1]) > 0 else 1250e6
+    last_elapsed = columns[0][-1] if len(columns[0]) > 0 else 0
+    write_sparams(os.path.join(folder, 'Latest_Sparams.txt'), measurement, points, last_frequency, last_elapsed)
+    return measurement
+
+
+def follow_folder(folder, measurement, points):
+    # Adds a row and a new sweep every interval until stopped
+    while True:
+        time.sleep(measurement.interval)
+        columns = write_datalog(os.path.join(folder, '0_data_log.txt'), measurement, 1, append=True)
+        write_sparams(os.path.join(folder, 'Latest_Sparams.txt'), measurement, points, columns[1][-1], columns[0][-1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Writes a synthetic measurement folder")
+    parser.add_argument('folder')
+    parser.add_argument('--hours', type=float, default=24, help="Hours of data already in the data log")
+    parser.add_argument('--interval', type=float, default=3, help="Seconds between sweeps")
+    parser.add_argument('--points', type=int, default=1001, help="Points per S11 sweep")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--follow', action='store_true', help="Keep adding sweeps until stopped")
+    parser.add_argument('--sweeps', action='store_true', help="Also write every sweep of the run to <folder>/Sweeps")
+    arguments = parser.parse_args()
+    Measurement = write_folder(arguments.folder, arguments.hours, arguments.interval, arguments.points, arguments.seed, arguments.sweeps)
+    print(f"Wrote {Measurement.rows} rows to {arguments.folder}")
+    if arguments.follow:
+        try:
+            follow_folder(arguments.folder, Measurement, arguments.points)
+        except KeyboardInterrupt:
+            pass
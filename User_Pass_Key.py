@@ -1,4 +1,5 @@
 hostname = ''
+port = 22
 user = ''
 password = ''
 remote_path = ''